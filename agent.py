@@ -1,31 +1,55 @@
 import streamlit as st
-from openai import OpenAI
+from streamlit.errors import StreamlitAPIException
 import json
 import datetime
-from dotenv import load_dotenv
+import logging
 import os
+import uuid
+import analytics
+import llm
+import prompts
+import review_queue
+import staff_auth
+import structured_output
+import tenants
+from session_model import TurnLog, IntakeResponses, question_id_for
 
-# Load environment variables from .env file
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-# Set up OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Load configuration once per process (from .env file and environment)
+@st.cache_resource
+def get_config():
+    from dotenv import load_dotenv
+    load_dotenv()
+    return llm.load_provider_config()
 
-# Firm specialties - customize for your firm
-FIRM_SPECIALTIES = [
-    "Motor Vehicle Accidents",
-    "Commercial Truck Accidents",
-    "Catastrophic Injuries",
-    "Medical Malpractice",
-    "Premises Liability",
-    "Product Liability",
-    "Wrongful Death"
-]
+# Build each model provider once per process. Every session shares it, so the
+# OpenAI client's connection pool is reused across sessions and reruns.
+@st.cache_resource
+def get_named_provider(name, site=None):
+    return llm.build_provider(name, get_config(), site)
+
+# Model provider for one call site (see llm.CALL_SITES), with the configured fallback
+@st.cache_resource
+def get_provider(site):
+    config = get_config()
+    name = config["sites"][site]
+    # Only the stub differs per site; real providers are shared by all sites
+    provider = get_named_provider(name, site if name == "stub" else None)
+    
+    fallback = config["fallback"]
+    if fallback and fallback != name:
+        provider = llm.FallbackProvider(provider, get_named_provider(fallback, site if fallback == "stub" else None))
+    return provider
+
+# The firm this session belongs to, with its compiled prompts
+def get_current_tenant():
+    return tenants.get_tenant(st.session_state.get("tenant_id"))
 
 # Custom styling - simplified to just change page background color
-def set_page_styling():
+def set_page_styling(tenant):
     # Define colors
-    bg_color = "#FFFFFF"  # White background
+    bg_color = tenant.branding["background_color"]
     
     # Apply custom CSS
     st.markdown(f"""
@@ -103,6 +127,14 @@ def get_current_date_info():
         "formatted": now.strftime("%B %d, %Y")
     }
 
+# Date fields used in prompt templates
+def get_date_fields(current_date_info):
+    return {
+        "date_formatted": current_date_info["formatted"],
+        "date": current_date_info["date"],
+        "year": current_date_info["year"]
+    }
+
 # Function to check if we have enough information to evaluate the case
 def have_sufficient_information():
     if not st.session_state.contact_info_collected:
@@ -115,76 +147,30 @@ def have_sufficient_information():
         return False
         
     # Check key information areas coverage
-    conversation_text = ' '.join([msg.get("content", "").lower() for msg in st.session_state.conversation_history])
-    
-    info_categories = {
-        "incident_details": False,  # What happened
-        "timeline_info": False,     # When it happened
-        "injury_info": False,       # Injuries sustained
-        "medical_info": False,      # Treatment received
-        "fault_info": False,        # Who was at fault
-        "evidence_info": False      # Documentation/evidence
-    }
+    conversation_text = ' '.join(st.session_state.conversation_history.contents()).lower()
     
     # Check for keywords in conversation
-    if any(term in conversation_text for term in ["accident", "incident", "happen", "occur", "event"]):
-        info_categories["incident_details"] = True
-        
-    if any(term in conversation_text for term in ["date", "when", "time", "month", "year", "ago"]):
-        info_categories["timeline_info"] = True
-        
-    if any(term in conversation_text for term in ["injury", "pain", "hurt", "damage", "broken", "trauma"]):
-        info_categories["injury_info"] = True
-        
-    if any(term in conversation_text for term in ["doctor", "hospital", "treatment", "therapy", "surgery", "medication"]):
-        info_categories["medical_info"] = True
-        
-    if any(term in conversation_text for term in ["fault", "cause", "responsible", "negligent", "liable"]):
-        info_categories["fault_info"] = True
-        
-    if any(term in conversation_text for term in ["evidence", "witness", "report", "document", "photo", "record"]):
-        info_categories["evidence_info"] = True
+    covered_categories = sum(1 for matcher in get_current_tenant().info_matchers if matcher.search(conversation_text))
     
     # Need at least 4 out of 6 categories covered
-    covered_categories = sum(1 for covered in info_categories.values() if covered)
     return covered_categories >= 4
 
 # Check if input contains harmful content or prompt injection attempts
 def check_content_safety(user_input):
     try:
-        # Call OpenAI's moderation API
-        response = client.moderations.create(input=user_input)
+        # Call the moderation provider
+        moderation = get_provider("moderation").moderate(user_input)
         
         # Check if the content was flagged
-        if response.results[0].flagged:
-            categories = response.results[0].categories
-            # Determine which category triggered the flag
-            flagged_categories = []
-            for category, flagged in categories.model_dump().items():
-                if flagged:
-                    flagged_categories.append(category)
-            
+        if moderation["flagged"]:
             return {
                 "safe": False,
-                "flagged_categories": flagged_categories
+                "flagged_categories": moderation["categories"]
             }
         
         # Also check for common prompt injection patterns
-        prompt_injection_patterns = [
-            "ignore previous instructions",
-            "disregard your instructions",
-            "forget your instructions",
-            "new instructions",
-            "you are now",
-            "system prompt",
-            "ignore the above",
-            "don't act as",
-            "stop being",
-            "you're not actually"
-        ]
-        
         lower_input = user_input.lower()
-        for pattern in prompt_injection_patterns:
+        for pattern in prompts.PROMPT_INJECTION_PATTERNS:
             if pattern in lower_input:
                 return {
                     "safe": False,
@@ -193,6 +179,14 @@ def check_content_safety(user_input):
         
         return {"safe": True}
     
+    except structured_output.StructuredOutputError:
+        # No usable verdict from the moderation model (counted in PARSE_STATS),
+        # so don't process the message
+        return {
+            "safe": False,
+            "flagged_categories": ["moderation_unavailable"]
+        }
+    
     except Exception as e:
         st.error(f"Error checking content safety: {str(e)}")
         # Default to allowing the message if the API call fails
@@ -201,85 +195,76 @@ def check_content_safety(user_input):
 # Initialize session state
 def init_session_state():
     session_vars = [
-        "current_stage", "intake_responses", "conversation_history", 
+        "current_stage", "conversation_history", "intake_responses", 
         "qualification_result", "is_complete", "disqualified",
         "disqualification_reason", "case_priority", "input_key",
-        "contact_info_collected", "user_input"
+        "contact_info_collected", "user_input", "intake_id",
+        "started_at", "intake_recorded", "tenant_id", "staff_account"
     ]
     
     for var in session_vars:
         if var not in st.session_state:
             if var == "current_stage":
                 st.session_state[var] = "welcome"
-            elif var == "intake_responses":
-                st.session_state[var] = {}
             elif var == "conversation_history":
-                st.session_state[var] = []
+                st.session_state[var] = TurnLog()
+            elif var == "intake_responses":
+                st.session_state[var] = IntakeResponses(st.session_state.conversation_history)
             elif var == "input_key":
                 st.session_state[var] = 0
             elif var == "contact_info_collected":
                 st.session_state[var] = False
             elif var == "user_input":
                 st.session_state[var] = ""
+            elif var == "intake_id":
+                st.session_state[var] = uuid.uuid4().hex
+            elif var == "intake_recorded":
+                st.session_state[var] = False
+            elif var == "tenant_id":
+                # Firm is chosen by the ?firm= link the client arrived through
+                st.session_state[var] = st.query_params.get("firm")
             else:
                 st.session_state[var] = None
 
 # Function to call GPT
 def call_gpt(user_input, system_message):
     try:
-        # Call the OpenAI API
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
+        # Call the model
+        assistant_message = get_provider("conversation").chat(
+            [
                 {"role": "system", "content": system_message},
-                *[{"role": msg["role"], "content": msg["content"]} for msg in st.session_state.conversation_history]
+                *st.session_state.conversation_history.messages()
             ],
             temperature=0.7,
             max_tokens=1000
         )
         
-        # Extract the assistant's message
-        assistant_message = response.choices[0].message.content
-        
         return assistant_message
     
     except Exception as e:
-        st.error(f"Error calling OpenAI API: {str(e)}")
+        st.error(f"Error calling the language model: {str(e)}")
         return "I'm sorry, I encountered an error processing your request."
 
 # Extract structured data from GPT response
 def extract_structured_data(response, question_id):
     try:
-        prompt = f"""
-        Based on the user's response: "{response}"
-        Extract the relevant answer for question ID: {question_id}
-        Format your response as a JSON object with a single field called 'extracted_value'
-        containing only the directly extracted answer. Keep it concise.
-        """
+        prompt = get_current_tenant().prompts["extraction"].substitute(response=response, question_id=question_id)
         
-        extraction_response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
+        data = structured_output.request(
+            get_provider("extraction"),
+            "extraction",
+            [
                 {"role": "system", "content": "You are a data extraction assistant that extracts specific values from text."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.3,
             max_tokens=200
         )
-        
-        result = extraction_response.choices[0].message.content
-        
-        # Try to parse JSON
-        try:
-            json_start = result.find('{')
-            json_end = result.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = result[json_start:json_end]
-                data = json.loads(json_str)
-                return data.get('extracted_value')
-        except:
-            pass
-            
+        return data["extracted_value"]
+    
+    except structured_output.StructuredOutputError as e:
+        # Keep the raw answer; the failure is counted in structured_output.PARSE_STATS
+        logger.warning("Invalid extraction output: %s", e)
         return response
         
     except Exception as e:
@@ -291,139 +276,59 @@ def check_disqualifiers(intake_responses):
     # Get current date information
     current_date_info = get_current_date_info()
     
-    system_message = f"""
-    You are an AI legal assistant specializing in personal injury case screening.
-    
-    TODAY'S DATE IS {current_date_info['formatted']} ({current_date_info['date']}).
-    
-    Evaluate if this case should be disqualified based on the following criteria:
-    1. Work-related injuries (workers' compensation)
-    2. Currently represented by another attorney
-    3. Outside statute of limitations (typically 2 years for most PI cases)
-       - Use TODAY'S DATE ({current_date_info['formatted']}) as the reference point for statute calculations
-    4. Outside the firm's practice jurisdiction
-    5. No clear liable party or extremely low damages
-    
-    When evaluating statute of limitations:
-    - Use {current_date_info['year']} as the current year
-    - Use exact dates when provided to calculate time elapsed since incident
-    - IMPORTANT: Do NOT disqualify cases where the incident happened within the past 2 years from today
-    
-    Based solely on the intake information, provide your assessment in JSON format:
-    {{
-      "disqualified": true/false,
-      "reason": "Brief explanation if disqualified",
-      "disqualifier_type": "workers_comp/current_representation/statute_expired/jurisdiction/minimal_case/none"
-    }}
-    
-    Here is the intake information:
-    {json.dumps(intake_responses, indent=2)}
-    """
+    system_message = get_current_tenant().prompts["disqualifier"].substitute(
+        **get_date_fields(current_date_info),
+        intake_responses=json.dumps(intake_responses, indent=2)
+    )
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
+        return structured_output.request(
+            get_provider("disqualifiers"),
+            "disqualifiers",
+            [
                 {"role": "system", "content": system_message}
             ],
             temperature=0.3,
             max_tokens=500
         )
-        
-        result = response.choices[0].message.content
-        
-        # Extract JSON from response
-        try:
-            json_start = result.find('{')
-            json_end = result.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = result[json_start:json_end]
-                data = json.loads(json_str)
-                return data
-        except:
-            st.error("Error parsing disqualifier assessment")
-            return {"disqualified": False, "reason": "Unable to assess", "disqualifier_type": "none"}
+    
+    except structured_output.StructuredOutputError as e:
+        st.error("Error parsing disqualifier assessment")
+        return {"disqualified": False, "reason": "Unable to assess", "disqualifier_type": "none", "assessment_error": str(e)}
             
     except Exception as e:
-        st.error(f"Error calling OpenAI API: {str(e)}")
-        return {"disqualified": False, "reason": "Error in assessment", "disqualifier_type": "none"}
+        st.error(f"Error calling the language model: {str(e)}")
+        return {"disqualified": False, "reason": "Error in assessment", "disqualifier_type": "none", "assessment_error": str(e)}
 
 # Assess case priority
 def assess_case_priority(intake_responses):
     # Get current date information
     current_date_info = get_current_date_info()
     
-    system_message = f"""
-    You are an AI legal assistant specializing in personal injury case evaluation.
-    
-    TODAY'S DATE IS {current_date_info['formatted']} ({current_date_info['date']}).
-    
-    Evaluate this case to determine its priority for a personal injury law firm based on:
-    1. Injury severity (0-100)
-    2. Liability clarity (0-100)
-    3. Potential damages (0-100)
-    4. Documentation/evidence strength (0-100)
-    5. Time sensitivity
-    
-    Our firm specializes in: {", ".join(FIRM_SPECIALTIES)}
-    Cases matching our specialties should receive higher priority.
-    
-    Consider these high-value case indicators:
-    - Catastrophic injuries (brain damage, spinal cord, amputation, severe burns)
-    - Permanent disability or disfigurement
-    - Commercial vehicle/entity involvement
-    - Clear liability against insured/corporate defendant
-    - Multiple potentially responsible parties
-    - Extensive medical treatment or surgical intervention
-    
-    Based solely on the intake information, provide your assessment in JSON format:
-    {{
-      "total_score": 0-100,
-      "priority_level": "URGENT/HIGH/MEDIUM/LOW/UNLIKELY",
-      "components": {{
-        "injury": 0-100,
-        "liability": 0-100,
-        "damages": 0-100,
-        "documentation": 0-100
-      }},
-      "case_type": "Auto Accident/Slip and Fall/Medical Malpractice/etc.",
-      "suggested_action": "Brief next steps",
-      "estimated_value_range": "Rough estimate of case value range",
-      "matches_firm_specialty": true/false,
-      "specialty_matched": "Name of specialty if matched"
-    }}
-    
-    Here is the intake information:
-    {json.dumps(intake_responses, indent=2)}
-    """
+    system_message = get_current_tenant().prompts["priority"].substitute(
+        **get_date_fields(current_date_info),
+        intake_responses=json.dumps(intake_responses, indent=2)
+    )
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
+        return structured_output.request(
+            get_provider("priority"),
+            "priority",
+            [
                 {"role": "system", "content": system_message}
             ],
             temperature=0.3,
             max_tokens=800
         )
-        
-        result = response.choices[0].message.content
-        
-        # Extract JSON from response
-        try:
-            json_start = result.find('{')
-            json_end = result.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = result[json_start:json_end]
-                data = json.loads(json_str)
-                return data
-        except:
-            st.error("Error parsing case priority assessment")
-            return {"priority_level": "UNKNOWN", "total_score": 0}
+    
+    # Either way the error is recorded on the case so staff can see it was never scored
+    except structured_output.StructuredOutputError as e:
+        st.error("Error parsing case priority assessment")
+        return {"priority_level": "UNKNOWN", "total_score": 0, "assessment_error": str(e)}
             
     except Exception as e:
-        st.error(f"Error calling OpenAI API: {str(e)}")
-        return {"priority_level": "UNKNOWN", "total_score": 0}
+        st.error(f"Error calling the language model: {str(e)}")
+        return {"priority_level": "UNKNOWN", "total_score": 0, "assessment_error": str(e)}
 
 # Generate next question
 def get_next_question():
@@ -440,9 +345,8 @@ def get_next_question():
         have_name = have_phone = have_email = True
     else:
         # Scan existing responses for contact info
-        for item in st.session_state.intake_responses.values():
-            question = item.get("question", "").lower()
-            answer = item.get("answer", "")
+        for question, answer in st.session_state.intake_responses.question_answers():
+            question = question.lower()
             
             if "name" in question and answer and len(answer) > 2:
                 have_name = True
@@ -457,53 +361,21 @@ def get_next_question():
     
     # Prioritize collecting contact information first
     if not have_name:
-        return "What is your full name?"
+        return prompts.NAME_QUESTION
     elif not have_phone:
-        return "What is the best phone number to reach you at?"
+        return prompts.PHONE_QUESTION
     elif not have_email:
-        return "What is your email address?"
+        return prompts.EMAIL_QUESTION
     
     # Check if this is the first question after contact info
     if len(st.session_state.intake_responses) == 3:  # We've only collected name, phone, email
-        return "Please describe what happened in the incident. Include any details about when and where it occurred, how it happened, and any injuries you experienced."
+        return prompts.INCIDENT_QUESTION
     
     # Enhanced intake specialist prompt with improved follow-up questioning
-    system_message = f"""
-    # Personal Injury Intake System Prompt
-
-    You are an intake specialist for a personal injury law firm. Ask the NEXT MOST RELEVANT question to evaluate this potential case.
-    
-    TODAY'S DATE IS {current_date_info['formatted']} ({current_date_info['date']}).
-
-    ## STRICT PROHIBITIONS:
-    - NEVER ask if the client wants to discuss options or explore compensation
-    - NEVER ask if they want to proceed or continue - just ask the next question directly
-    - DO NOT provide legal advice or guidance during this information collection phase
-    - DO NOT discuss potential compensation amounts or case values
-    - DO NOT mention what the law firm will do next
-    - DO NOT ask repetitive questions about topics already covered
-    
-    ## ALWAYS:
-    - Ask ONE specific, fact-gathering question at a time
-    - Focus exclusively on gathering factual case information
-    - Be conversational but direct
-    - Ask follow-up questions about topics not yet fully explored
-    
-    ## INFORMATION COLLECTION PRIORITIES:
-    1. Incident type and description
-    2. Date and location of incident (specific date in MM/DD/YYYY format)
-    3. Injuries sustained and severity
-    4. Medical treatment received and ongoing needs
-    5. Liable parties and fault determination
-    6. Evidence and documentation available
-    7. Insurance information
-    8. Impact on work/income
-    
-    ## Our firm specializes in: {", ".join(FIRM_SPECIALTIES)}
-    
-    Current responses collected:
-    {json.dumps(st.session_state.intake_responses, indent=2)}
-    """
+    system_message = get_current_tenant().prompts["next_question"].substitute(
+        **get_date_fields(current_date_info),
+        intake_responses=json.dumps(st.session_state.intake_responses.as_dict(), indent=2)
+    )
     
     return call_gpt("", system_message)
 
@@ -515,57 +387,58 @@ def process_user_input(user_input):
     # Check content safety before processing
     safety_check = check_content_safety(user_input)
     if not safety_check["safe"]:
+        # The message couldn't be checked: nothing to record, the client just resubmits
+        if safety_check["flagged_categories"] == ["moderation_unavailable"]:
+            st.error("We apologize, but we couldn't check your message just now. Please try submitting it again.")
+            return
+        
         # Log the safety violation
-        st.session_state.conversation_history.append({
-            "role": "system",
-            "content": f"Input was flagged for safety concerns: {safety_check['flagged_categories']}",
-            "timestamp": datetime.datetime.now().strftime("%I:%M %p")
-        })
+        st.session_state.conversation_history.append(
+            "system",
+            f"Input was flagged for safety concerns: {safety_check['flagged_categories']}"
+        )
         
         # Return a polite error message to the user
         st.error("We apologize, but your message contains content that our system cannot process. Please rephrase your message without any inappropriate content or attempts to override the system.")
         return
         
-    # Add user message to conversation history with timestamp
-    current_time = datetime.datetime.now().strftime("%I:%M %p")
-    st.session_state.conversation_history.append({
-        "role": "user", 
-        "content": user_input,
-        "timestamp": current_time
-    })
+    # The question being answered is the last assistant message; system turns
+    # (such as a flagged message) may come between it and the answer
+    question_turn = st.session_state.conversation_history.last_index("assistant")
+    question_text = st.session_state.conversation_history.content(question_turn)
     
-    # Process the user's response
-    question_text = st.session_state.conversation_history[-2]["content"]  # Get the last assistant message
+    # Add user message to conversation history with timestamp
+    answer_turn = st.session_state.conversation_history.append("user", user_input)
     
     # Generate a question ID based on the content
-    import hashlib
-    question_id = hashlib.md5(question_text.encode()).hexdigest()[:8]
+    question_id = question_id_for(question_text)
     
     # Extract structured data from the response
     extracted_value = extract_structured_data(user_input, question_id)
     
-    # Store the response
-    st.session_state.intake_responses[question_id] = {
-        "question": question_text,
-        "answer": user_input,
-        "extracted_value": extracted_value
-    }
+    # Store the response (question and answer are referenced by turn, not copied)
+    st.session_state.intake_responses.record(question_id, question_turn, answer_turn, extracted_value)
     
     # Check intake progress - after 8 questions, check for disqualifiers
     if len(st.session_state.intake_responses) >= 8:
-        disqualifier_check = check_disqualifiers(st.session_state.intake_responses)
+        disqualifier_check = check_disqualifiers(st.session_state.intake_responses.as_dict())
         
         if disqualifier_check.get("disqualified", False):
             st.session_state.disqualified = True
             st.session_state.disqualification_reason = disqualifier_check
-            st.session_state.current_stage = "results"
+            log_intake_event("disqualified", {"disqualifier_type": disqualifier_check.get("disqualifier_type")})
+            set_stage("results")
             st.rerun()
     
     # Check if we have sufficient information to evaluate the case
     if have_sufficient_information() and st.session_state.contact_info_collected:
         # Perform final assessment
-        priority_assessment = assess_case_priority(st.session_state.intake_responses)
+        priority_assessment = assess_case_priority(st.session_state.intake_responses.as_dict())
         st.session_state.case_priority = priority_assessment
+        log_intake_event("assessed", {
+            "priority_level": priority_assessment.get("priority_level"),
+            "case_type": priority_assessment.get("case_type")
+        })
         
         # Check if the case is unlikely to qualify
         if priority_assessment.get("priority_level") == "UNLIKELY":
@@ -574,23 +447,48 @@ def process_user_input(user_input):
                 "disqualifier_type": "minimal_case",
                 "reason": "Case appears to have insufficient severity/liability/documentation."
             }
+            log_intake_event("disqualified", {"disqualifier_type": "minimal_case"})
         
-        st.session_state.current_stage = "results"
+        set_stage("results")
         st.rerun()
     
     # Get the next question and add it to conversation history
     next_question = get_next_question()
     # Add the assistant's message to conversation history with timestamp
-    current_time = datetime.datetime.now().strftime("%I:%M %p")
-    st.session_state.conversation_history.append({
-        "role": "assistant", 
-        "content": next_question,
-        "timestamp": current_time
-    })
+    st.session_state.conversation_history.append("assistant", next_question)
     
     # Increment the input key to refresh the input field
     refresh_input()
-    st.rerun()
+    rerun_conversation()
+
+# Redraw just the conversation fragment for the next question. Falls back to a
+# full rerun when the submission arrived during a full app run.
+def rerun_conversation():
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+# Record an intake lifecycle event for analytics. Failures are logged but
+# never interrupt the client's intake.
+def log_intake_event(event_type, detail=None):
+    try:
+        analytics.record_event(
+            st.session_state.intake_id,
+            event_type,
+            tenant_id=get_current_tenant().id,
+            stage=st.session_state.current_stage,
+            detail=detail
+        )
+    except Exception as e:
+        logger.warning("Error recording %s event: %s", event_type, e)
+
+# Move the intake to a new stage and record the transition
+def set_stage(stage):
+    previous_stage = st.session_state.current_stage
+    st.session_state.current_stage = stage
+    if previous_stage != stage:
+        log_intake_event("stage_changed", {"from": previous_stage, "to": stage})
 
 # Function to exit/cancel the current session
 def exit_session():
@@ -611,33 +509,15 @@ def generate_disqualification_message(disqualifier_data):
     # Get current date information
     current_date_info = get_current_date_info()
     
-    system_message = f"""
-    You are an empathetic intake specialist for a personal injury law firm.
-    
-    TODAY'S DATE IS {current_date_info['formatted']}.
-    
-    Generate a polite and helpful message to a potential client whose case we cannot accept.
-    
-    Disqualification reason: {disqualifier_type}
-    Details: {reason}
-    
-    The message should:
-    1. Thank them for reaching out
-    2. Politely explain why their case may not be a good fit for our firm
-    3. Provide helpful next steps or alternative resources
-    4. Invite them to call during business hours if they have questions
-    
-    IMPORTANT REQUIREMENTS:
-    - Use only declarative statements, no questions
-    - Do not discuss potential compensation amounts or case values
-    - Do not ask if they want to proceed with anything - provide clear next steps instead
-    - Be compassionate but clear
-    - Don't provide false hope
-    """
+    system_message = get_current_tenant().prompts["disqualification_message"].substitute(
+        **get_date_fields(current_date_info),
+        disqualifier_type=disqualifier_type,
+        reason=reason
+    )
     
     message = call_gpt("", system_message)
     # Remove the message that was added by call_gpt
-    if st.session_state.conversation_history and st.session_state.conversation_history[-1]["role"] == "assistant":
+    if st.session_state.conversation_history and st.session_state.conversation_history.role(-1) == "assistant":
         st.session_state.conversation_history.pop()
     return message
 
@@ -650,57 +530,261 @@ def generate_qualification_summary(priority_data):
     current_date_info = get_current_date_info()
     
     # Determine appropriate response time based on priority
-    if priority_level == "URGENT":
-        response_time = "within 2 hours during business hours"
-    elif priority_level == "HIGH":
-        response_time = "within 24 hours"
-    elif priority_level == "MEDIUM":
-        response_time = "within 2-3 business days"
-    else:
-        response_time = "within a week"
-    
-    system_message = f"""
-    You are an intake specialist for a personal injury law firm.
+    tenant = get_current_tenant()
+    response_time = tenant.get_response_time(priority_level)
     
-    TODAY'S DATE IS {current_date_info['formatted']}.
-    
-    Generate a summary for a potential client whose case has been initially qualified.
-    
-    The message should:
-    1. Thank them for providing their information
-    2. Briefly summarize what they've told us about their case
-    3. Explain that a member of our legal staff will review their information and contact them {response_time}
-    4. Inform them they will receive a secure link to upload relevant documents
-    5. Let them know they will be sent a copy of our agreement
-    
-    Suggested next action: {suggested_action}
-    
-    STRICT REQUIREMENTS:
-    - Use only declarative statements and sentences
-    - Do NOT include any questions in your response - not even rhetorical ones
-    - Do NOT ask if they would like help with anything else
-    - Do NOT mention potential compensation or case value in any way
-    - Do NOT suggest or imply any particular outcome of their case
-    - Present all next steps clearly as statements of what will happen next
-    - Do NOT end with questions like "Would you like to discuss your options?" or similar
-    
-    Be professional, confident and compassionate.
-    Do NOT mention any priority status, case scores, or internal evaluation metrics.
-    Always use "member of our legal staff" rather than "attorney" when referring to who will contact them.
-    """
+    system_message = tenant.prompts["qualification_summary"].substitute(
+        **get_date_fields(current_date_info),
+        response_time=response_time,
+        suggested_action=suggested_action
+    )
     
     message = call_gpt("", system_message)
     # Remove the message that was added by call_gpt
-    if st.session_state.conversation_history and st.session_state.conversation_history[-1]["role"] == "assistant":
+    if st.session_state.conversation_history and st.session_state.conversation_history.role(-1) == "assistant":
         st.session_state.conversation_history.pop()
     return message
 
+# Render the transcript straight from the turn log. The text is not kept in
+# session state, so each session holds one copy of its transcript.
+def show_transcript():
+    conversation_history = st.session_state.conversation_history
+    
+    rendered = []
+    for i in range(len(conversation_history)):
+        role = conversation_history.role(i)
+        if role == "assistant":
+            rendered.append(f"**Assistant:** {conversation_history.content(i)}  *{conversation_history.formatted_time(i)}*")
+        elif role == "user":
+            rendered.append(f"**You:** {conversation_history.content(i)}  *{conversation_history.formatted_time(i)}*")
+        # Don't display system messages to the user
+    
+    # One element for the whole transcript instead of one per message
+    st.markdown("\n\n".join(rendered))
+
+# Transcript and input form. Submitting an answer reruns only this fragment,
+# so the page styling and the rest of the app are not rebuilt on every turn.
+@st.fragment
+def intake_conversation():
+    show_transcript()
+    
+    # Create a form to handle Enter key submission
+    with st.form(key="user_input_form", clear_on_submit=True):
+        user_input = st.text_input(
+            "Your response:",
+            key="user_input", 
+            autocomplete="off"  # Try to disable autocomplete
+        )
+        
+        # Standard submit button
+        submit_button = st.form_submit_button("Submit")
+        
+        if submit_button and user_input:
+            process_user_input(user_input)
+
+# Save the completed intake to the attorney review queue
+def record_completed_intake():
+    if st.session_state.intake_recorded:
+        return
+    
+    tenant = get_current_tenant()
+    try:
+        review_queue.enqueue_intake(
+            st.session_state.intake_id,
+            st.session_state.intake_responses.as_dict(),
+            case_priority=st.session_state.case_priority,
+            disqualified=bool(st.session_state.disqualified),
+            disqualification_reason=st.session_state.disqualification_reason,
+            started_at=st.session_state.started_at,
+            tenant_id=tenant.id,
+            sla_hours=tenant.sla_hours,
+            business_hours=tenant.business_hours
+        )
+        st.session_state.intake_recorded = True
+    except Exception as e:
+        st.error(f"Error saving intake for review: {str(e)}")
+        return
+    
+    started_at = st.session_state.started_at
+    log_intake_event("completed", {
+        "outcome": "disqualified" if st.session_state.disqualified else "qualified",
+        "priority_level": (st.session_state.case_priority or {}).get("priority_level"),
+        "turns": len(st.session_state.intake_responses),
+        "duration_seconds": (review_queue.utc_now() - started_at).total_seconds() if started_at else None
+    })
+
+# Staff accounts from the [staff] section of .streamlit/secrets.toml
+def get_staff_accounts():
+    try:
+        staff_secrets = st.secrets.get("staff", {})
+    except FileNotFoundError:
+        staff_secrets = {}
+    return staff_auth.load_staff_accounts(staff_secrets)
+
+# The signed-in staff member ({"username", "firm"}), showing the sign-in form
+# until there is one. Returns None while signed out.
+def require_staff_login():
+    accounts = get_staff_accounts()
+    
+    # Re-check every run so removing an account or changing its firm takes effect
+    account = st.session_state.staff_account
+    if account and accounts.get(account["username"], {}).get("firm") == account["firm"]:
+        return account
+    st.session_state.staff_account = None
+    
+    st.markdown("### Staff Sign In")
+    if not accounts:
+        st.error("No staff accounts are configured. Add them to .streamlit/secrets.toml (see README).")
+        return None
+    
+    with st.form(key="staff_login_form"):
+        username = st.text_input("Username", autocomplete="off")
+        password = st.text_input("Password", type="password", autocomplete="off")
+        submitted = st.form_submit_button("Sign In")
+    
+    if submitted:
+        account = staff_auth.authenticate(username, password, accounts)
+        if account:
+            st.session_state.staff_account = account
+            st.rerun()
+        st.error("Invalid username or password")
+    return None
+
+# Staff pages (For Law Firm Use). Staff only see intakes for their own firm.
+def show_staff_view(view):
+    account = require_staff_login()
+    if not account:
+        return
+    
+    st.caption(f"Signed in as {account['username']} ({account['firm']})")
+    if st.button("Sign Out"):
+        st.session_state.staff_account = None
+        st.rerun()
+    
+    if view == "review":
+        show_review_queue(account["firm"])
+    elif view == "analytics":
+        show_analytics(account["firm"])
+
+# Render one queue entry for staff
+def show_queue_entry(entry, section, tenant_id):
+    case_type = entry.get("case_type") or "Unclassified"
+    specialty = entry.get("specialty_matched")
+    specialty_display = f" | {specialty}" if specialty else ""
+    st.markdown(f"**{entry['priority_level']}** - {case_type}{specialty_display} - due {entry['sla_deadline']}")
+    with st.expander(f"Intake {entry['intake_id'][:8]}"):
+        st.json(entry["intake_responses"])
+        if entry.get("case_priority"):
+            st.json(entry["case_priority"])
+        if entry.get("disqualification_reason"):
+            st.json(entry["disqualification_reason"])
+        if st.button("Mark as Reviewed", key=f"review_{section}_{entry['intake_id']}"):
+            review_queue.mark_reviewed(entry["intake_id"], tenant_id=tenant_id)
+            st.rerun()
+
+# Next-due list, refreshed on a timer so staff see new intakes as they arrive
+@st.fragment(run_every=30)
+def show_next_due(tenant_id):
+    st.markdown("#### Next Due")
+    counts = review_queue.get_queue_counts(tenant_id=tenant_id)
+    if counts:
+        st.write(" | ".join(f"{level}: {counts[level]}" for level in sorted(counts, key=lambda level: review_queue.PRIORITY_RANK.get(level, 99))))
+    
+    for entry in review_queue.get_next_due(limit=5, tenant_id=tenant_id):
+        show_queue_entry(entry, "due", tenant_id)
+
+# Attorney review queue for one firm
+def show_review_queue(tenant_id):
+    st.markdown("### Attorney Review Queue")
+    
+    # Model replies that failed validation since this server started
+    parse_stats = structured_output.get_parse_stats()
+    failures = {site: outcomes.get("failed", 0) for site, outcomes in parse_stats.items() if outcomes.get("failed")}
+    if failures:
+        st.warning("Unparseable model responses: " + ", ".join(f"{site}: {count}" for site, count in failures.items()))
+    
+    show_next_due(tenant_id)
+    
+    st.markdown("#### All Pending Intakes")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        priority_level = st.selectbox("Priority", ["All", *review_queue.PRIORITY_RANK.keys()])
+    with col2:
+        case_type = st.text_input("Case type", autocomplete="off")
+    with col3:
+        specialty = st.text_input("Specialty", autocomplete="off")
+    
+    # Start from the first page whenever the filters change
+    queue_filters = (priority_level, case_type, specialty)
+    if st.session_state.get("queue_filters") != queue_filters:
+        st.session_state.queue_filters = queue_filters
+        st.session_state.queue_cursors = [None]
+    
+    entries, next_cursor = review_queue.get_review_queue(
+        page_size=25,
+        after=st.session_state.queue_cursors[-1],
+        priority_level=None if priority_level == "All" else priority_level,
+        case_type=case_type or None,
+        specialty=specialty or None,
+        tenant_id=tenant_id
+    )
+    
+    for entry in entries:
+        show_queue_entry(entry, "all", tenant_id)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if len(st.session_state.queue_cursors) > 1 and st.button("Previous Page"):
+            st.session_state.queue_cursors.pop()
+            st.rerun()
+    with col2:
+        if next_cursor and st.button("Next Page"):
+            st.session_state.queue_cursors.append(next_cursor)
+            st.rerun()
+
+# Intake funnel dashboard for one firm, read from the daily rollups
+def show_analytics(tenant_id):
+    st.markdown("### Intake Analytics")
+    
+    days = st.selectbox("Period", [7, 30, 90, 365], index=1, format_func=lambda days: f"Last {days} days")
+    end_day = review_queue.utc_now().date()
+    start_day = end_day - datetime.timedelta(days=days - 1)
+    summary = analytics.get_summary(start_day.isoformat(), end_day.isoformat(), tenant_id=tenant_id)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Intakes Started", summary["started"])
+    col2.metric("Intakes Completed", summary["completed"])
+    col3.metric("Median Questions", summary["median_turns"] if summary["median_turns"] is not None else "-")
+    col4.metric("Median Minutes", summary["median_minutes"] if summary["median_minutes"] is not None else "-")
+    
+    if summary["completion_rate"] is not None:
+        st.write(f"**Completion rate:** {summary['completion_rate']:.0%}")
+    if summary["disqualification_rate"] is not None:
+        st.write(f"**Disqualification rate:** {summary['disqualification_rate']:.0%}")
+    
+    if summary["disqualification_rate_by_type"]:
+        st.markdown("#### Disqualifications by Type")
+        st.bar_chart({"rate": summary["disqualification_rate_by_type"]})
+    if summary["case_types"]:
+        st.markdown("#### Case Types")
+        st.bar_chart({"intakes": summary["case_types"]})
+    if summary["priorities"]:
+        st.markdown("#### Priority Levels")
+        st.bar_chart({"intakes": summary["priorities"]})
+
 # The Streamlit App
 def main():
-    set_page_styling()
-    
-    st.title("Personal Injury Law Firm")
     init_session_state()
+    tenant = get_current_tenant()
+    set_page_styling(tenant)
+    
+    st.title(tenant.branding["title"])
+    
+    # Staff views of completed intakes
+    view = st.query_params.get("view")
+    if view in ("review", "analytics"):
+        show_staff_view(view)
+        return
     
     # Display current stage
     if st.session_state.current_stage == "welcome":
@@ -725,48 +809,19 @@ def main():
         """)
         
         if st.button("Start Case Evaluation"):
-            st.session_state.current_stage = "intake"
+            set_stage("intake")
             st.rerun()
     
     elif st.session_state.current_stage == "intake":
         st.markdown("### Personal Injury Case Evaluation")
         
-        # Display conversation history
-        for i, message in enumerate(st.session_state.conversation_history):
-            if message["role"] == "assistant":
-                timestamp = message.get("timestamp", "")
-                timestamp_display = f" *{timestamp}*" if timestamp else ""
-                st.write(f"**Assistant:** {message['content']} {timestamp_display}")
-            elif message["role"] == "user":
-                timestamp = message.get("timestamp", "")
-                timestamp_display = f" *{timestamp}*" if timestamp else ""
-                st.write(f"**You:** {message['content']} {timestamp_display}")
-            # Don't display system messages to the user
-        
         # If we haven't asked a question yet, ask the first question
         if len(st.session_state.conversation_history) == 0:
-            first_question = "Hi there! I'm here to help evaluate your potential personal injury case. Are you filling out this information for yourself or on behalf of someone else?"
-            current_time = datetime.datetime.now().strftime("%I:%M %p")
-            st.session_state.conversation_history.append({
-                "role": "assistant", 
-                "content": first_question,
-                "timestamp": current_time
-            })
-            st.rerun()
+            st.session_state.started_at = review_queue.utc_now()
+            log_intake_event("started")
+            st.session_state.conversation_history.append("assistant", prompts.GREETING_QUESTION)
         
-        # Create a form to handle Enter key submission
-        with st.form(key="user_input_form", clear_on_submit=True):
-            user_input = st.text_input(
-                "Your response:",
-                key="user_input", 
-                autocomplete="off"  # Try to disable autocomplete
-            )
-            
-            # Standard submit button
-            submit_button = st.form_submit_button("Submit")
-            
-            if submit_button and user_input:
-                process_user_input(user_input)
+        intake_conversation()
         
         # Move exit button to bottom of page
         st.write("")  # Add some space
@@ -776,6 +831,7 @@ def main():
     
     elif st.session_state.current_stage == "results":
         st.markdown("### Case Evaluation Results")
+        record_completed_intake()
         
         if st.session_state.disqualified:
             st.warning("Based on the information provided, we may not be able to assist with your case.")
@@ -804,7 +860,8 @@ def main():
             if st.button("Start New Evaluation"):
                 for key in list(st.session_state.keys()):
                     del st.session_state[key]
-                st.session_state.current_stage = "intake"
+                init_session_state()
+                set_stage("intake")
                 st.rerun()
         with col2:
             if st.button("Return to Home"):
@@ -838,7 +895,7 @@ def main():
             
             # Display intake responses (JSON format only)
             st.markdown("#### Intake Responses")
-            st.json(st.session_state.intake_responses)
+            st.json(st.session_state.intake_responses.as_dict())
             
             # Display priority/qualification data
             if st.session_state.case_priority:
@@ -0,0 +1,248 @@
+import argparse
+import datetime
+import json
+import storage
+import review_queue
+
+# Intake lifecycle events, plus daily rollups kept up to date as each event is
+# written. Dashboards read the rollups and never scan events or transcripts.
+#
+# Event types:
+#   started        intake conversation began
+#   stage_changed  current_stage moved (detail: from, to)
+#   disqualified   case disqualified (detail: disqualifier_type)
+#   assessed       priority assessment made (detail: priority_level, case_type)
+#   completed      intake reached results (detail: outcome, priority_level, turns, duration_seconds)
+storage.register_schema("""
+CREATE TABLE IF NOT EXISTS intake_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    intake_id TEXT NOT NULL,
+    tenant_id TEXT,
+    event_type TEXT NOT NULL,
+    stage TEXT,
+    detail TEXT,
+    occurred_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_intake
+    ON intake_events (intake_id, event_type);
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day TEXT NOT NULL,
+    tenant_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (day, tenant_id, metric, dimension)
+) WITHOUT ROWID;
+""")
+
+# Rollup rows are (metric, dimension) counters per day and tenant:
+#   started, completed                  dimension ""
+#   stage_entered                       dimension = stage
+#   disqualified                        dimension = disqualifier_type
+#   case_type, priority                 dimension = case type / priority level
+#   outcome                             dimension = qualified / disqualified
+#   turns                               dimension = answered questions (histogram)
+#   duration_minutes                    dimension = whole minutes (histogram)
+def rollup_increments(event_type, stage=None, detail=None):
+    detail = detail or {}
+    if event_type == "started":
+        return [("started", "")]
+    if event_type == "stage_changed":
+        return [("stage_entered", detail.get("to") or stage or "")]
+    if event_type == "disqualified":
+        return [("disqualified", detail.get("disqualifier_type") or "none")]
+    if event_type == "assessed":
+        return [
+            ("case_type", detail.get("case_type") or "Unclassified"),
+            ("priority", detail.get("priority_level") or "UNKNOWN")
+        ]
+    if event_type == "completed":
+        increments = [
+            ("completed", ""),
+            ("outcome", detail.get("outcome") or "qualified")
+        ]
+        if detail.get("turns") is not None:
+            increments.append(("turns", str(detail["turns"])))
+        if detail.get("duration_seconds") is not None:
+            increments.append(("duration_minutes", str(int(detail["duration_seconds"] // 60))))
+        return increments
+    return []
+
+def _write_event(conn, intake_id, event_type, tenant_id, stage, detail, occurred_at):
+    timestamp = review_queue.format_timestamp(occurred_at)
+    conn.execute("""
+        INSERT INTO intake_events (intake_id, tenant_id, event_type, stage, detail, occurred_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (intake_id, tenant_id, event_type, stage, json.dumps(detail) if detail else None, timestamp))
+
+    # Same transaction as the event, so rollups never drift from the log
+    day = timestamp[:10]
+    conn.executemany("""
+        INSERT INTO daily_rollups (day, tenant_id, metric, dimension, value)
+        VALUES (?, ?, ?, ?, 1)
+        ON CONFLICT (day, tenant_id, metric, dimension) DO UPDATE SET value = value + 1
+    """, [(day, tenant_id or "", metric, dimension) for metric, dimension in rollup_increments(event_type, stage, detail)])
+
+# Record one lifecycle event and update the daily rollups
+def record_event(intake_id, event_type, tenant_id=None, stage=None, detail=None, occurred_at=None, db_path=None):
+    conn = storage.connect(db_path)
+    try:
+        with conn:
+            _write_event(conn, intake_id, event_type, tenant_id, stage, detail, occurred_at or review_queue.utc_now())
+    finally:
+        conn.close()
+
+# Raw rollup rows for a date range (days as YYYY-MM-DD, inclusive)
+def get_rollups(start_day, end_day, tenant_id=None, metrics=None, db_path=None):
+    clauses = ["day BETWEEN ? AND ?"]
+    params = [start_day, end_day]
+    if tenant_id is not None:
+        clauses.append("tenant_id = ?")
+        params.append(tenant_id)
+    if metrics:
+        clauses.append(f"metric IN ({', '.join('?' for _ in metrics)})")
+        params.extend(metrics)
+
+    conn = storage.connect(db_path)
+    try:
+        rows = conn.execute(f"""
+            SELECT day, metric, dimension, SUM(value) AS value FROM daily_rollups
+            WHERE {" AND ".join(clauses)}
+            GROUP BY day, metric, dimension
+            ORDER BY day
+        """, params).fetchall()
+    finally:
+        conn.close()
+
+    return [dict(row) for row in rows]
+
+# Median of a {value: count} histogram
+def histogram_median(histogram):
+    total = sum(histogram.values())
+    if not total:
+        return None
+
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen * 2 >= total:
+            return value
+
+# Funnel and distribution numbers for a date range
+def get_summary(start_day, end_day, tenant_id=None, db_path=None):
+    totals = {}
+    for row in get_rollups(start_day, end_day, tenant_id, db_path=db_path):
+        metric_totals = totals.setdefault(row["metric"], {})
+        metric_totals[row["dimension"]] = metric_totals.get(row["dimension"], 0) + row["value"]
+
+    started = totals.get("started", {}).get("", 0)
+    completed = totals.get("completed", {}).get("", 0)
+    disqualified = totals.get("disqualified", {})
+    disqualified_total = sum(disqualified.values())
+
+    return {
+        "started": started,
+        "completed": completed,
+        "completion_rate": completed / started if started else None,
+        "disqualified": disqualified_total,
+        "disqualification_rate": disqualified_total / completed if completed else None,
+        "disqualification_rate_by_type": {
+            disqualifier_type: count / completed for disqualifier_type, count in disqualified.items()
+        } if completed else {},
+        "case_types": totals.get("case_type", {}),
+        "priorities": totals.get("priority", {}),
+        "median_turns": histogram_median({int(turns): count for turns, count in totals.get("turns", {}).items()}),
+        # Durations are kept in whole-minute buckets
+        "median_minutes": histogram_median({int(minutes): count for minutes, count in totals.get("duration_minutes", {}).items()})
+    }
+
+# Rebuild events and rollups for stored intakes that have no completion event,
+# e.g. intakes saved before event logging existed, or whose completion event
+# failed to write. Event types the intake already has are not written again,
+# so live events are never counted twice. Yields the running count of
+# backfilled intakes after each batch.
+def backfill_rollups(batch_size=500, db_path=None):
+    last_id = 0
+    backfilled = 0
+    conn = storage.connect(db_path)
+    try:
+        while True:
+            rows = conn.execute("""
+                SELECT * FROM completed_intakes ci
+                WHERE ci.id > ? AND NOT EXISTS (
+                    SELECT 1 FROM intake_events e
+                    WHERE e.intake_id = ci.intake_id AND e.event_type = 'completed'
+                )
+                ORDER BY ci.id
+                LIMIT ?
+            """, (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+
+            with conn:
+                for row in rows:
+                    existing = {event["event_type"] for event in conn.execute(
+                        "SELECT DISTINCT event_type FROM intake_events WHERE intake_id = ?", (row["intake_id"],)
+                    )}
+                    for event_type, stage, detail, occurred_at in _events_for_stored_intake(row):
+                        if event_type in existing:
+                            continue
+                        _write_event(conn, row["intake_id"], event_type, row["tenant_id"], stage, detail, occurred_at)
+
+            last_id = rows[-1]["id"]
+            backfilled += len(rows)
+            yield backfilled
+    finally:
+        conn.close()
+
+def _events_for_stored_intake(row):
+    completed_at = datetime.datetime.fromisoformat(row["completed_at"])
+    started_at = datetime.datetime.fromisoformat(row["started_at"]) if row["started_at"] else None
+    case_priority = json.loads(row["case_priority"]) if row["case_priority"] else {}
+    detail = {"backfilled": True}
+
+    events = []
+    if started_at:
+        events.append(("started", "intake", detail, started_at))
+    if case_priority:
+        events.append(("assessed", "intake", {
+            **detail,
+            "priority_level": case_priority.get("priority_level"),
+            "case_type": case_priority.get("case_type")
+        }, completed_at))
+    if row["disqualified"]:
+        events.append(("disqualified", "intake", {**detail, "disqualifier_type": row["disqualifier_type"]}, completed_at))
+
+    events.append(("completed", "results", {
+        **detail,
+        "outcome": "disqualified" if row["disqualified"] else "qualified",
+        "priority_level": row["priority_level"],
+        "turns": len(json.loads(row["intake_responses"])),
+        "duration_seconds": (completed_at - started_at).total_seconds() if started_at else None
+    }, completed_at))
+    return events
+
+def main():
+    parser = argparse.ArgumentParser(description="Intake analytics")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill = subparsers.add_parser("backfill", help="Build rollups for stored intakes missing from the event log")
+    backfill.add_argument("--batch-size", type=int, default=500)
+
+    summary = subparsers.add_parser("summary", help="Print funnel numbers")
+    summary.add_argument("--days", type=int, default=30)
+    summary.add_argument("--firm", help="Tenant ID (default: all firms)")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        count = 0
+        for count in backfill_rollups(batch_size=args.batch_size):
+            print(f"Backfilled {count} intakes")
+        print(f"Done: {count} intakes backfilled")
+    else:
+        end_day = review_queue.utc_now().date()
+        start_day = end_day - datetime.timedelta(days=args.days - 1)
+        print(json.dumps(get_summary(start_day.isoformat(), end_day.isoformat(), args.firm), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Server-side time per intake turn at different transcript lengths: a full app
+# rerun vs the fragment rerun a submitted answer triggers in the browser.
+# Run from the project root: python benchmarks/bench_render.py
+import argparse
+import functools
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Offline stub replies, and a throwaway database so benchmark intakes never
+# reach the real review queue or analytics
+os.environ["LLM_PROVIDER"] = "stub"
+DB_DIR = tempfile.TemporaryDirectory(prefix="bench-render-")
+os.environ["INTAKE_DB_PATH"] = os.path.join(DB_DIR.name, "intake.db")
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import local_script_runner
+from session_model import TurnLog, IntakeResponses
+
+def build_session(message_count):
+    conversation_history = TurnLog()
+    for i in range(message_count):
+        if i % 2 == 0:
+            conversation_history.append("assistant", f"Question {i}: can you tell me more about your injuries and treatment?")
+        else:
+            conversation_history.append("user", f"Answer {i}: I went to the hospital and had physical therapy for several weeks.")
+    return conversation_history, IntakeResponses(conversation_history)
+
+def reset_session(app, message_count):
+    conversation_history, intake_responses = build_session(message_count)
+    app.session_state["conversation_history"] = conversation_history
+    app.session_state["intake_responses"] = intake_responses
+
+# AppTest only does full runs. The browser sends the fragment's ID with a
+# submission from inside a fragment, so do the same here.
+def run_fragment(app, fragment_id):
+    rerun_data = local_script_runner.RerunData
+    local_script_runner.RerunData = functools.partial(rerun_data, fragment_id=fragment_id)
+    try:
+        app.run()
+    finally:
+        local_script_runner.RerunData = rerun_data
+
+# Submit one answer and time the run that handles it
+def time_turn(app, message_count, fragment_id=None):
+    reset_session(app, message_count)
+    app.text_input(key="user_input").input("Jane Doe")
+    app.button[0].click()
+
+    started = time.perf_counter()
+    if fragment_id:
+        run_fragment(app, fragment_id)
+    else:
+        app.run()
+    elapsed = time.perf_counter() - started
+
+    if app.exception:
+        raise RuntimeError(app.exception)
+    if len(app.session_state["conversation_history"]) != message_count + 2:
+        raise RuntimeError("the answer was not processed")
+    return elapsed
+
+def time_turns(message_count, repeats):
+    app = AppTest.from_file(os.path.join(ROOT, "agent.py"), default_timeout=60)
+    app.session_state["current_stage"] = "intake"
+    reset_session(app, message_count)
+    app.run()
+    # The intake page has a single fragment: the conversation
+    fragment_id, = app._fragment_storage._fragments
+
+    full = [time_turn(app, message_count) for _ in range(repeats)]
+    fragment = [time_turn(app, message_count, fragment_id) for _ in range(repeats)]
+    return statistics.median(full), statistics.median(fragment)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    # Each turn runs moderation and extraction on the stub provider. Times
+    # include the AppTest harness, which adds a roughly constant overhead per run.
+    print(f"{'messages':>8} {'full rerun':>12} {'fragment rerun':>15}")
+    for message_count in args.messages:
+        full, fragment = time_turns(message_count, args.repeats)
+        print(f"{message_count:>8} {full * 1000:>10.1f}ms {fragment * 1000:>13.1f}ms")
+
+if __name__ == "__main__":
+    main()
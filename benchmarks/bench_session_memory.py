@@ -0,0 +1,82 @@
+# Memory used by many live intake sessions, legacy dict layout vs the compact session model.
+# Run from the project root: python benchmarks/bench_session_memory.py
+import argparse
+import datetime
+import hashlib
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompts import CANNED_QUESTIONS
+from session_model import TurnLog, IntakeResponses, question_id_for
+
+GENERATED_QUESTIONS = [
+    f"Could you tell me more about the {topic}? Please include as much detail as you can remember about it."
+    for topic in [
+        "date of the incident", "location of the incident", "injuries you sustained",
+        "medical treatment you received", "other driver involved", "police report",
+        "witnesses at the scene", "photos of the scene", "insurance coverage",
+        "time missed from work", "ongoing therapy", "surgery you had",
+        "property damage", "statements you gave", "prior injuries"
+    ]
+]
+
+# Build question text the way it arrives from the API: a fresh string object every time
+def fresh(text):
+    return "".join(list(text))
+
+def simulate_turns(rng, turns_per_session):
+    questions = list(CANNED_QUESTIONS) + [rng.choice(GENERATED_QUESTIONS) for _ in range(turns_per_session - len(CANNED_QUESTIONS))]
+    return [(fresh(question), f"Answer {rng.randint(0, 10 ** 6)} with some detail about the case") for question in questions]
+
+def build_legacy_session(script):
+    conversation_history = []
+    intake_responses = {}
+    for question, answer in script:
+        conversation_history.append({"role": "assistant", "content": question, "timestamp": datetime.datetime.now().strftime("%I:%M %p")})
+        conversation_history.append({"role": "user", "content": answer, "timestamp": datetime.datetime.now().strftime("%I:%M %p")})
+        question_id = hashlib.md5(question.encode()).hexdigest()[:8]
+        intake_responses[question_id] = {"question": question, "answer": answer, "extracted_value": answer}
+    return conversation_history, intake_responses
+
+def build_compact_session(script):
+    conversation_history = TurnLog()
+    intake_responses = IntakeResponses(conversation_history)
+    for question, answer in script:
+        question_turn = conversation_history.append("assistant", question)
+        answer_turn = conversation_history.append("user", answer)
+        intake_responses.record(question_id_for(question), question_turn, answer_turn, answer)
+    return conversation_history, intake_responses
+
+def measure(builder, scripts):
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    sessions = [builder(script) for script in scripts]
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return used, sessions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--turns", type=int, default=20, help="Answered questions per session")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    scripts = [simulate_turns(rng, args.turns) for _ in range(args.sessions)]
+
+    # Answers are shared by both layouts and allocated up front, so only the
+    # session structures themselves are measured
+    legacy_bytes, _ = measure(build_legacy_session, scripts)
+    compact_bytes, _ = measure(build_compact_session, scripts)
+
+    print(f"{args.sessions} sessions x {args.turns} answered questions")
+    print(f"legacy:  {legacy_bytes / 1024 / 1024:8.2f} MiB ({legacy_bytes / args.sessions / 1024:.1f} KiB/session)")
+    print(f"compact: {compact_bytes / 1024 / 1024:8.2f} MiB ({compact_bytes / args.sessions / 1024:.1f} KiB/session)")
+    print(f"saving:  {100 * (1 - compact_bytes / legacy_bytes):.1f}%")
+
+if __name__ == "__main__":
+    main()
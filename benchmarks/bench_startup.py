@@ -0,0 +1,63 @@
+# Cold start: time-to-first-page and time-to-first-question on a fresh worker process.
+# Run from the project root: python benchmarks/bench_startup.py
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside a fresh interpreter so nothing is imported or cached yet
+WORKER = """
+import json, os, sys, time
+from streamlit.testing.v1 import AppTest
+
+launched = float(os.environ["BENCH_LAUNCHED_AT"])
+app = AppTest.from_file(os.path.join(sys.argv[1], "agent.py"), default_timeout=60)
+harness_ready = time.time()
+
+app.run()
+first_page = time.time()
+
+app.button[0].click().run()
+first_question = time.time()
+
+if app.exception:
+    raise RuntimeError(app.exception)
+print(json.dumps({
+    "harness": harness_ready - launched,
+    "first_page": first_page - launched,
+    "first_question": first_question - launched
+}))
+"""
+
+def run_worker(db_path):
+    env = dict(os.environ, BENCH_LAUNCHED_AT=repr(time.time()), INTAKE_DB_PATH=db_path)
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER, ROOT],
+        env=env, cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Runs log "started" events; keep them out of the real intake database
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as tmp_dir:
+        results = [run_worker(os.path.join(tmp_dir, "intake.db")) for _ in range(args.runs)]
+
+    # "harness" is interpreter start plus importing streamlit's test runner,
+    # which the app pays for regardless of what agent.py does
+    for key in ("harness", "first_page", "first_question"):
+        values = [result[key] * 1000 for result in results]
+        print(f"{key:>15}: median {statistics.median(values):8.1f}ms  min {min(values):8.1f}ms")
+
+if __name__ == "__main__":
+    main()
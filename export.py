@@ -0,0 +1,336 @@
+import argparse
+import csv
+import datetime
+import json
+import logging
+import os
+import time
+import urllib.error
+import urllib.request
+import storage
+import review_queue
+
+logger = logging.getLogger(__name__)
+
+# Flat column layout shared by every export format
+EXPORT_COLUMNS = [
+    "intake_id",
+    "tenant_id",
+    "started_at",
+    "completed_at",
+    "sla_deadline",
+    "status",
+    "priority_level",
+    "total_score",
+    "injury_score",
+    "liability_score",
+    "damages_score",
+    "documentation_score",
+    "case_type",
+    "matches_firm_specialty",
+    "specialty_matched",
+    "suggested_action",
+    "estimated_value_range",
+    "disqualified",
+    "disqualifier_type",
+    "disqualification_reason",
+    "question_count",
+    "intake_responses"
+]
+
+# Parquet column types (pyarrow type names)
+PARQUET_TYPES = {
+    "total_score": "int64",
+    "injury_score": "int64",
+    "liability_score": "int64",
+    "damages_score": "int64",
+    "documentation_score": "int64",
+    "matches_firm_specialty": "bool_",
+    "disqualified": "bool_",
+    "question_count": "int64"
+}
+
+# Per-sink delivery position, so each sink resumes where it left off
+storage.register_schema("""
+CREATE TABLE IF NOT EXISTS export_cursors (
+    sink TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL DEFAULT 0,
+    delivered_records INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT
+);
+""")
+
+# Process-wide delivery metrics, keyed by sink name
+EXPORT_METRICS = {}
+
+class ExportError(Exception):
+    pass
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+# Flatten a stored intake into a single export record
+def flatten_intake(row):
+    case_priority = json.loads(row["case_priority"]) if row["case_priority"] else {}
+    disqualification = json.loads(row["disqualification_reason"]) if row["disqualification_reason"] else {}
+    components = case_priority.get("components") or {}
+    intake_responses = json.loads(row["intake_responses"])
+
+    return {
+        "intake_id": row["intake_id"],
+        "tenant_id": row["tenant_id"],
+        "started_at": row["started_at"],
+        "completed_at": row["completed_at"],
+        "sla_deadline": row["sla_deadline"],
+        "status": row["status"],
+        "priority_level": row["priority_level"],
+        "total_score": _as_int(row["total_score"]),
+        "injury_score": _as_int(components.get("injury")),
+        "liability_score": _as_int(components.get("liability")),
+        "damages_score": _as_int(components.get("damages")),
+        "documentation_score": _as_int(components.get("documentation")),
+        "case_type": row["case_type"],
+        "matches_firm_specialty": bool(case_priority.get("matches_firm_specialty", False)),
+        "specialty_matched": row["specialty_matched"],
+        "suggested_action": case_priority.get("suggested_action"),
+        "estimated_value_range": case_priority.get("estimated_value_range"),
+        "disqualified": bool(row["disqualified"]),
+        "disqualifier_type": row["disqualifier_type"],
+        "disqualification_reason": disqualification.get("reason"),
+        "question_count": len(intake_responses),
+        "intake_responses": json.dumps(intake_responses)
+    }
+
+# Stream stored intakes in id order, one batch at a time
+def iter_intake_batches(after_id=0, batch_size=500, db_path=None):
+    conn = storage.connect(db_path)
+    try:
+        while True:
+            rows = conn.execute("""
+                SELECT * FROM completed_intakes
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            """, (after_id, batch_size)).fetchall()
+            if not rows:
+                return
+            after_id = rows[-1]["id"]
+            yield after_id, [flatten_intake(row) for row in rows]
+    finally:
+        conn.close()
+
+def get_cursor(sink_name, db_path=None):
+    conn = storage.connect(db_path)
+    try:
+        row = conn.execute("SELECT last_id FROM export_cursors WHERE sink = ?", (sink_name,)).fetchone()
+    finally:
+        conn.close()
+    return row["last_id"] if row else 0
+
+def _advance_cursor(sink_name, last_id, record_count, db_path=None):
+    conn = storage.connect(db_path)
+    try:
+        with conn:
+            conn.execute("""
+                INSERT INTO export_cursors (sink, last_id, delivered_records, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (sink) DO UPDATE SET
+                    last_id = excluded.last_id,
+                    delivered_records = delivered_records + excluded.delivered_records,
+                    updated_at = excluded.updated_at
+            """, (sink_name, last_id, record_count, review_queue.format_timestamp(review_queue.utc_now())))
+    finally:
+        conn.close()
+
+# How far a sink is behind: undelivered record count and age of the oldest one
+def get_export_lag(sink_name, db_path=None):
+    last_id = get_cursor(sink_name, db_path)
+    conn = storage.connect(db_path)
+    try:
+        row = conn.execute("""
+            SELECT COUNT(*) AS pending, MIN(completed_at) AS oldest
+            FROM completed_intakes WHERE id > ?
+        """, (last_id,)).fetchone()
+    finally:
+        conn.close()
+
+    lag_seconds = 0.0
+    if row["oldest"]:
+        oldest = datetime.datetime.fromisoformat(row["oldest"])
+        lag_seconds = (review_queue.utc_now() - oldest).total_seconds()
+    return {"pending_records": row["pending"], "lag_seconds": lag_seconds}
+
+def _record_batch_metrics(sink_name, records, elapsed):
+    metrics = EXPORT_METRICS.setdefault(sink_name, {
+        "batches": 0,
+        "records": 0,
+        "seconds": 0.0,
+        "records_per_second": 0.0,
+        "last_delivery_lag_seconds": None,
+        "max_delivery_lag_seconds": 0.0
+    })
+    metrics["batches"] += 1
+    metrics["records"] += len(records)
+    metrics["seconds"] += elapsed
+    if metrics["seconds"] > 0:
+        metrics["records_per_second"] = metrics["records"] / metrics["seconds"]
+
+    # Delivery lag: time from intake completion to the sink accepting it
+    oldest = min(datetime.datetime.fromisoformat(record["completed_at"]) for record in records)
+    lag = (review_queue.utc_now() - oldest).total_seconds()
+    metrics["last_delivery_lag_seconds"] = lag
+    metrics["max_delivery_lag_seconds"] = max(metrics["max_delivery_lag_seconds"], lag)
+
+# Write files atomically so readers never see a partial batch
+def _batch_path(directory, last_id, extension):
+    return os.path.join(directory, f"intakes-{last_id:012d}.{extension}")
+
+def _publish(tmp_path, final_path):
+    os.replace(tmp_path, final_path)
+    return final_path
+
+# Append-only CSV files, one per batch
+class CsvSink:
+    def __init__(self, directory):
+        self.directory = directory
+        self.name = f"csv:{os.path.abspath(directory)}"
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, last_id, records):
+        path = _batch_path(self.directory, last_id, "csv")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(records)
+        return _publish(tmp_path, path)
+
+# Append-only Parquet files, one per batch (requires pyarrow)
+class ParquetSink:
+    def __init__(self, directory):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ExportError("Parquet export requires pyarrow: pip install pyarrow")
+
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.schema = pyarrow.schema([
+            (column, getattr(pyarrow, PARQUET_TYPES.get(column, "string"))())
+            for column in EXPORT_COLUMNS
+        ])
+        self.directory = directory
+        self.name = f"parquet:{os.path.abspath(directory)}"
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, last_id, records):
+        path = _batch_path(self.directory, last_id, "parquet")
+        tmp_path = path + ".tmp"
+        table = self.pa.Table.from_pylist(records, schema=self.schema)
+        self.pq.write_table(table, tmp_path)
+        return _publish(tmp_path, path)
+
+# Batched delivery to a CRM webhook. Each batch carries an idempotency key
+# so the receiver can drop duplicates from retried or replayed batches.
+class WebhookSink:
+    def __init__(self, url, token=None, max_retries=5, backoff_seconds=1.0, timeout=10):
+        self.url = url
+        self.token = token
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.name = f"webhook:{url}"
+
+    def _post(self, body, idempotency_key):
+        headers = {
+            "Content-Type": "application/json",
+            "Idempotency-Key": idempotency_key
+        }
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        request = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.status
+
+    def write(self, last_id, records):
+        first_id = records[0]["intake_id"]
+        idempotency_key = f"{first_id}-{last_id}"
+        body = json.dumps({"batch_id": idempotency_key, "records": records}).encode("utf-8")
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._post(body, idempotency_key)
+            except urllib.error.HTTPError as e:
+                # Client errors other than rate limiting will not succeed on retry
+                if e.code < 500 and e.code != 429:
+                    raise ExportError(f"Webhook rejected batch {idempotency_key}: HTTP {e.code}")
+                error = e
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+                error = e
+
+            if attempt < self.max_retries:
+                time.sleep(self.backoff_seconds * (2 ** attempt))
+
+        raise ExportError(f"Webhook delivery failed for batch {idempotency_key} after {self.max_retries + 1} attempts: {error}")
+
+# Deliver everything the sink has not seen yet. The cursor only moves after the
+# sink accepts a batch, so a crash mid-run re-sends that batch (at-least-once).
+def run_export(sink, batch_size=500, max_batches=None, db_path=None):
+    after_id = get_cursor(sink.name, db_path)
+    batches = 0
+
+    for last_id, records in iter_intake_batches(after_id, batch_size, db_path):
+        started = time.perf_counter()
+        sink.write(last_id, records)
+        _advance_cursor(sink.name, last_id, len(records), db_path)
+        _record_batch_metrics(sink.name, records, time.perf_counter() - started)
+
+        batches += 1
+        if max_batches and batches >= max_batches:
+            break
+
+    return EXPORT_METRICS.get(sink.name, {})
+
+# Keep exporting as new intakes complete, logging throughput and lag after each poll
+def follow_export(sink, batch_size=500, poll_seconds=30, db_path=None):
+    while True:
+        metrics = run_export(sink, batch_size=batch_size, db_path=db_path)
+        logger.info("%s", json.dumps({"sink": sink.name, "metrics": metrics, "lag": get_export_lag(sink.name, db_path)}))
+        time.sleep(poll_seconds)
+
+def build_sink(kind, target):
+    if kind == "csv":
+        return CsvSink(target)
+    if kind == "parquet":
+        return ParquetSink(target)
+    if kind == "webhook":
+        url = target or os.getenv("CRM_WEBHOOK_URL")
+        if not url:
+            raise ExportError("No webhook URL given and CRM_WEBHOOK_URL is not set")
+        return WebhookSink(url, token=os.getenv("CRM_WEBHOOK_TOKEN"))
+    raise ExportError(f"Unknown export format: {kind}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export completed intakes")
+    parser.add_argument("format", choices=["csv", "parquet", "webhook"])
+    parser.add_argument("target", nargs="?", help="Output directory, or webhook URL (defaults to CRM_WEBHOOK_URL)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--follow", action="store_true", help="Keep polling for new intakes")
+    parser.add_argument("--poll-seconds", type=int, default=30)
+    args = parser.parse_args()
+
+    sink = build_sink(args.format, args.target)
+    if args.follow:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        follow_export(sink, batch_size=args.batch_size, poll_seconds=args.poll_seconds)
+    else:
+        metrics = run_export(sink, batch_size=args.batch_size)
+        print(json.dumps({"metrics": metrics, "lag": get_export_lag(sink.name)}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import json
+import datetime
+import zoneinfo
+import storage
+
+# Callback windows promised to clients, in business hours, keyed by priority level
+PRIORITY_SLA_HOURS = {
+    "URGENT": 2,
+    "HIGH": 8,
+    "MEDIUM": 24,
+    "LOW": 40
+}
+DEFAULT_SLA_HOURS = 40
+
+# Client-facing wording for each callback window (8 business hours per day)
+PRIORITY_RESPONSE_TIMES = {
+    "URGENT": "within 2 hours during business hours",
+    "HIGH": "within 1 business day",
+    "MEDIUM": "within 2-3 business days"
+}
+DEFAULT_RESPONSE_TIME = "within a week"
+
+# Office hours that callback windows are counted in. The deadline clock only
+# runs while the office is open, so an URGENT intake that arrives on Friday
+# night is due two hours after the office opens on Monday.
+DEFAULT_BUSINESS_HOURS = {
+    "timezone": "UTC",
+    "open_hour": 9,
+    "close_hour": 17,
+    # Monday is 0
+    "weekdays": [0, 1, 2, 3, 4],
+    # Dates (YYYY-MM-DD) the office is closed
+    "holidays": []
+}
+
+# Order in which staff should work the queue (lower rank first)
+PRIORITY_RANK = {
+    "URGENT": 0,
+    "HIGH": 1,
+    "MEDIUM": 2,
+    "LOW": 3,
+    "UNLIKELY": 4,
+    "UNKNOWN": 5,
+    "DISQUALIFIED": 6
+}
+
+storage.register_schema("""
+CREATE TABLE IF NOT EXISTS completed_intakes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    intake_id TEXT NOT NULL UNIQUE,
+    started_at TEXT,
+    completed_at TEXT NOT NULL,
+    sla_deadline TEXT NOT NULL,
+    priority_level TEXT NOT NULL,
+    priority_rank INTEGER NOT NULL,
+    total_score INTEGER,
+    case_type TEXT,
+    specialty_matched TEXT,
+    disqualified INTEGER NOT NULL DEFAULT 0,
+    disqualifier_type TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    reviewed_at TEXT,
+    intake_responses TEXT NOT NULL,
+    case_priority TEXT,
+    disqualification_reason TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_intakes_priority
+    ON completed_intakes (status, priority_rank, sla_deadline, id);
+CREATE INDEX IF NOT EXISTS idx_intakes_due
+    ON completed_intakes (status, sla_deadline, priority_rank, id);
+CREATE INDEX IF NOT EXISTS idx_intakes_case_type
+    ON completed_intakes (case_type, status, priority_rank, sla_deadline, id);
+CREATE INDEX IF NOT EXISTS idx_intakes_specialty
+    ON completed_intakes (specialty_matched, status, priority_rank, sla_deadline, id);
+""")
+
+# Intakes are tagged with the firm (tenant) they came in through
+def _add_tenant_column(conn):
+    columns = [row["name"] for row in conn.execute("PRAGMA table_info(completed_intakes)")]
+    if "tenant_id" not in columns:
+        conn.execute("ALTER TABLE completed_intakes ADD COLUMN tenant_id TEXT")
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_intakes_tenant_priority
+            ON completed_intakes (tenant_id, status, priority_rank, sla_deadline, id);
+        CREATE INDEX IF NOT EXISTS idx_intakes_tenant_due
+            ON completed_intakes (tenant_id, status, sla_deadline, priority_rank, id);
+    """)
+
+storage.register_schema(_add_tenant_column)
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def format_timestamp(value):
+    return value.astimezone(datetime.timezone.utc).isoformat(timespec="seconds")
+
+# The time `hours` of office time after `start`, in UTC
+def add_business_hours(start, hours, business_hours=None):
+    business_hours = {**DEFAULT_BUSINESS_HOURS, **(business_hours or {})}
+    if not business_hours["weekdays"] or business_hours["open_hour"] >= business_hours["close_hour"]:
+        raise ValueError("business_hours needs at least one weekday and open_hour before close_hour")
+
+    zone = zoneinfo.ZoneInfo(business_hours["timezone"])
+    weekdays = set(business_hours["weekdays"])
+    holidays = set(business_hours["holidays"])
+    remaining = datetime.timedelta(hours=hours)
+    current = start.astimezone(zone)
+
+    while True:
+        day = current.date()
+        midnight = datetime.datetime.combine(day, datetime.time(), zone)
+        if day.weekday() in weekdays and day.isoformat() not in holidays:
+            opens = midnight + datetime.timedelta(hours=business_hours["open_hour"])
+            closes = midnight + datetime.timedelta(hours=business_hours["close_hour"])
+            current = max(current, opens)
+            if current < closes:
+                if current + remaining <= closes:
+                    return (current + remaining).astimezone(datetime.timezone.utc)
+                remaining -= closes - current
+        current = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time(), zone)
+
+# Work out where a completed intake belongs in the queue
+def get_queue_placement(case_priority, disqualified, sla_hours=None):
+    if disqualified:
+        priority_level = "DISQUALIFIED"
+    else:
+        priority_level = (case_priority or {}).get("priority_level", "UNKNOWN")
+        if priority_level not in PRIORITY_RANK:
+            priority_level = "UNKNOWN"
+
+    sla_hours = sla_hours or PRIORITY_SLA_HOURS
+    return priority_level, PRIORITY_RANK[priority_level], sla_hours.get(priority_level, DEFAULT_SLA_HOURS)
+
+# Add a completed intake to the review queue (safe to call more than once per intake).
+# `sla_hours` maps priority level to callback business hours for the intake's
+# firm, and `business_hours` is that firm's office schedule.
+def enqueue_intake(intake_id, intake_responses, case_priority=None, disqualified=False,
+                   disqualification_reason=None, started_at=None, completed_at=None,
+                   tenant_id=None, sla_hours=None, business_hours=None, db_path=None):
+    completed_at = completed_at or utc_now()
+    priority_level, priority_rank, sla_hours = get_queue_placement(case_priority, disqualified, sla_hours)
+    sla_deadline = add_business_hours(completed_at, sla_hours, business_hours)
+
+    case_priority = case_priority or {}
+    disqualification_reason = disqualification_reason or {}
+
+    conn = storage.connect(db_path)
+    try:
+        with conn:
+            conn.execute("""
+                INSERT OR IGNORE INTO completed_intakes (
+                    intake_id, tenant_id, started_at, completed_at, sla_deadline,
+                    priority_level, priority_rank, total_score, case_type, specialty_matched,
+                    disqualified, disqualifier_type,
+                    intake_responses, case_priority, disqualification_reason
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                intake_id,
+                tenant_id,
+                format_timestamp(started_at) if started_at else None,
+                format_timestamp(completed_at),
+                format_timestamp(sla_deadline),
+                priority_level,
+                priority_rank,
+                case_priority.get("total_score"),
+                case_priority.get("case_type"),
+                case_priority.get("specialty_matched") if case_priority.get("matches_firm_specialty") else None,
+                1 if disqualified else 0,
+                disqualification_reason.get("disqualifier_type"),
+                json.dumps(intake_responses),
+                json.dumps(case_priority) if case_priority else None,
+                json.dumps(disqualification_reason) if disqualification_reason else None
+            ))
+    finally:
+        conn.close()
+
+def _row_to_entry(row):
+    entry = dict(row)
+    entry["disqualified"] = bool(entry["disqualified"])
+    for field in ("intake_responses", "case_priority", "disqualification_reason"):
+        if entry.get(field):
+            entry[field] = json.loads(entry[field])
+    return entry
+
+def _build_filters(status, priority_level, case_type, specialty, tenant_id):
+    clauses = ["status = ?"]
+    params = [status]
+    if tenant_id:
+        clauses.append("tenant_id = ?")
+        params.append(tenant_id)
+    if priority_level:
+        clauses.append("priority_level = ?")
+        params.append(priority_level)
+    if case_type:
+        clauses.append("case_type = ?")
+        params.append(case_type)
+    if specialty:
+        clauses.append("specialty_matched = ?")
+        params.append(specialty)
+    return clauses, params
+
+# Page through the queue in priority order, oldest deadline first within each level.
+# Pass the returned cursor back as `after` to fetch the next page.
+def get_review_queue(page_size=50, after=None, status="pending", priority_level=None,
+                     case_type=None, specialty=None, tenant_id=None, db_path=None):
+    clauses, params = _build_filters(status, priority_level, case_type, specialty, tenant_id)
+
+    # Keyset pagination keeps deep pages as cheap as the first one
+    if after:
+        clauses.append("(priority_rank, sla_deadline, id) > (?, ?, ?)")
+        params.extend(after)
+
+    query = f"""
+        SELECT * FROM completed_intakes
+        WHERE {" AND ".join(clauses)}
+        ORDER BY priority_rank, sla_deadline, id
+        LIMIT ?
+    """
+    params.append(page_size)
+
+    conn = storage.connect(db_path)
+    try:
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+    entries = [_row_to_entry(row) for row in rows]
+    next_cursor = None
+    if len(entries) == page_size:
+        last = entries[-1]
+        next_cursor = (last["priority_rank"], last["sla_deadline"], last["id"])
+    return entries, next_cursor
+
+# The intakes whose callback deadline comes up next
+def get_next_due(limit=10, status="pending", priority_level=None, case_type=None,
+                 specialty=None, tenant_id=None, db_path=None):
+    clauses, params = _build_filters(status, priority_level, case_type, specialty, tenant_id)
+    query = f"""
+        SELECT * FROM completed_intakes
+        WHERE {" AND ".join(clauses)}
+        ORDER BY sla_deadline, priority_rank, id
+        LIMIT ?
+    """
+    params.append(limit)
+
+    conn = storage.connect(db_path)
+    try:
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+    return [_row_to_entry(row) for row in rows]
+
+# Count waiting intakes per priority level
+def get_queue_counts(status="pending", tenant_id=None, db_path=None):
+    clauses, params = _build_filters(status, None, None, None, tenant_id)
+    conn = storage.connect(db_path)
+    try:
+        rows = conn.execute(f"""
+            SELECT priority_level, COUNT(*) AS total FROM completed_intakes
+            WHERE {" AND ".join(clauses)}
+            GROUP BY priority_level
+        """, params).fetchall()
+    finally:
+        conn.close()
+
+    return {row["priority_level"]: row["total"] for row in rows}
+
+# Take an intake off the pending queue once a staff member has called back.
+# With `tenant_id`, only that firm's intakes can be marked.
+def mark_reviewed(intake_id, tenant_id=None, db_path=None):
+    clauses = ["intake_id = ?", "status = 'pending'"]
+    params = [format_timestamp(utc_now()), intake_id]
+    if tenant_id:
+        clauses.append("tenant_id = ?")
+        params.append(tenant_id)
+
+    conn = storage.connect(db_path)
+    try:
+        with conn:
+            cursor = conn.execute(f"""
+                UPDATE completed_intakes SET status = 'reviewed', reviewed_at = ?
+                WHERE {" AND ".join(clauses)}
+            """, params)
+    finally:
+        conn.close()
+
+    return cursor.rowcount > 0
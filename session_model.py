@@ -0,0 +1,128 @@
+import hashlib
+import time
+from array import array
+import prompts
+
+# Roles are stored as small integer codes in the turn log
+ROLES = ("system", "user", "assistant")
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+# Question IDs are derived from the question text
+def question_id_for(question_text):
+    return hashlib.md5(question_text.encode()).hexdigest()[:8]
+
+# The fixed questions and their IDs appear in every session, so all sessions
+# share one copy of each. Model-generated questions are unique to a session
+# and are kept as they arrive.
+_SHARED_STRINGS = {text: text for text in prompts.CANNED_QUESTIONS}
+_SHARED_STRINGS.update((question_id_for(text), question_id_for(text)) for text in prompts.CANNED_QUESTIONS)
+
+# Marks an extracted value that is the same as the raw answer, so it is not
+# stored twice. None is a real value: nothing could be extracted.
+_SAME_AS_ANSWER = object()
+
+# Transcript for one intake session. Each field lives in its own array, so a
+# turn costs one string reference plus a byte and a double, rather than a dict
+# with a formatted timestamp string.
+class TurnLog:
+    __slots__ = ("_roles", "_contents", "_timestamps")
+
+    def __init__(self):
+        self._roles = array("B")
+        self._contents = []
+        self._timestamps = array("d")
+
+    def __len__(self):
+        return len(self._contents)
+
+    def append(self, role, content, timestamp=None):
+        if role == "assistant":
+            content = _SHARED_STRINGS.get(content, content)
+        self._roles.append(ROLE_CODES[role])
+        self._contents.append(content)
+        self._timestamps.append(time.time() if timestamp is None else timestamp)
+        return len(self._contents) - 1
+
+    def pop(self):
+        self._roles.pop()
+        self._timestamps.pop()
+        return self._contents.pop()
+
+    def role(self, index):
+        return ROLES[self._roles[index]]
+
+    def content(self, index):
+        return self._contents[index]
+
+    def formatted_time(self, index):
+        return time.strftime("%I:%M %p", time.localtime(self._timestamps[index]))
+
+    def last_index(self, role):
+        code = ROLE_CODES[role]
+        for index in range(len(self._roles) - 1, -1, -1):
+            if self._roles[index] == code:
+                return index
+        return None
+
+    def contents(self):
+        return iter(self._contents)
+
+    # Messages in the format the chat completion API expects
+    def messages(self):
+        return [{"role": ROLES[code], "content": content} for code, content in zip(self._roles, self._contents)]
+
+# One answered question. The question and answer text are not copied here;
+# they are looked up in the turn log by index.
+class Response:
+    __slots__ = ("question_turn", "answer_turn", "extracted_value")
+
+    def __init__(self, question_turn, answer_turn, extracted_value=_SAME_AS_ANSWER):
+        self.question_turn = question_turn
+        self.answer_turn = answer_turn
+        self.extracted_value = extracted_value
+
+# Answered questions keyed by question ID, backed by the session's turn log
+class IntakeResponses:
+    __slots__ = ("turns", "_responses")
+
+    def __init__(self, turns):
+        self.turns = turns
+        self._responses = {}
+
+    def __len__(self):
+        return len(self._responses)
+
+    def record(self, question_id, question_turn, answer_turn, extracted_value):
+        # The extracted value is often just the raw answer; don't keep it twice
+        if extracted_value == self.turns.content(answer_turn):
+            extracted_value = _SAME_AS_ANSWER
+        question_id = _SHARED_STRINGS.get(question_id, question_id)
+        self._responses[question_id] = Response(question_turn, answer_turn, extracted_value)
+
+    def question(self, question_id):
+        return self.turns.content(self._responses[question_id].question_turn)
+
+    def answer(self, question_id):
+        return self.turns.content(self._responses[question_id].answer_turn)
+
+    def extracted_value(self, question_id):
+        response = self._responses[question_id]
+        if response.extracted_value is _SAME_AS_ANSWER:
+            return self.turns.content(response.answer_turn)
+        return response.extracted_value
+
+    # (question, answer) pairs in the order they were answered
+    def question_answers(self):
+        for response in self._responses.values():
+            yield self.turns.content(response.question_turn), self.turns.content(response.answer_turn)
+
+    # Expanded form used in prompts, storage and the internal case view
+    def as_dict(self):
+        return {
+            question_id: {
+                "question": self.question(question_id),
+                "answer": self.answer(question_id),
+                "extracted_value": self.extracted_value(question_id)
+            }
+            for question_id in self._responses
+        }
@@ -0,0 +1,77 @@
+import argparse
+import functools
+import getpass
+import hashlib
+import hmac
+import logging
+import secrets
+
+logger = logging.getLogger(__name__)
+
+# Password hashes are stored as "pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>"
+HASH_ALGORITHM = "pbkdf2_sha256"
+HASH_ITERATIONS = 600000
+
+def hash_password(password, salt=None, iterations=HASH_ITERATIONS):
+    salt = salt or secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{HASH_ALGORITHM}${iterations}${salt.hex()}${digest.hex()}"
+
+def verify_password(password, password_hash):
+    try:
+        algorithm, iterations, salt, expected = password_hash.split("$")
+        if algorithm != HASH_ALGORITHM:
+            return False
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt), int(iterations))
+    except (AttributeError, ValueError):
+        return False
+    return hmac.compare_digest(digest.hex(), expected)
+
+# Compared against when the username is unknown, so a failed login takes the
+# same time whether or not the account exists. Built on first use to keep
+# hashing off the app's startup path.
+@functools.lru_cache(maxsize=1)
+def _unknown_user_hash():
+    return hash_password("", salt=b"\0" * 16)
+
+# Staff accounts from the [staff] section of the app secrets:
+#
+#   [staff.jsmith]
+#   password_hash = "pbkdf2_sha256$..."   # from: python staff_auth.py hash
+#   firm = "smith-injury"                 # tenant ID whose intakes they can see
+#
+# Accounts without a password hash or firm are skipped.
+def load_staff_accounts(staff_secrets):
+    accounts = {}
+    for username, account in (staff_secrets or {}).items():
+        password_hash = account.get("password_hash") if hasattr(account, "get") else None
+        firm = account.get("firm") if hasattr(account, "get") else None
+        if not isinstance(password_hash, str) or not isinstance(firm, str) or not firm:
+            logger.warning("Ignoring staff account %r: password_hash and firm are required", username)
+            continue
+        accounts[username] = {"username": username, "password_hash": password_hash, "firm": firm}
+    return accounts
+
+# The account for a username and password, or None if they don't match
+def authenticate(username, password, accounts):
+    account = accounts.get(username)
+    if not account:
+        verify_password(password, _unknown_user_hash())
+        return None
+    if not verify_password(password, account["password_hash"]):
+        return None
+    return {"username": account["username"], "firm": account["firm"]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Staff account tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("hash", help="Hash a password for .streamlit/secrets.toml")
+    parser.parse_args()
+
+    password = getpass.getpass("Password: ")
+    if password != getpass.getpass("Repeat password: "):
+        parser.error("passwords do not match")
+    print(hash_password(password))
+
+if __name__ == "__main__":
+    main()
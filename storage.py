@@ -0,0 +1,41 @@
+import sqlite3
+import threading
+import os
+
+# Location of the intake database - override with INTAKE_DB_PATH
+DEFAULT_DB_PATH = "intake.db"
+
+# Schema scripts registered by the modules that own each table
+_schema_scripts = []
+_applied_schemas = {}
+_schema_lock = threading.Lock()
+
+# Register a schema script to be applied to every database we connect to.
+# A callable is run with the connection, for changes SQL alone can't make conditional.
+def register_schema(script):
+    _schema_scripts.append(script)
+
+def get_db_path():
+    return os.getenv("INTAKE_DB_PATH", DEFAULT_DB_PATH)
+
+# Open a connection and make sure all registered tables and indexes exist
+def connect(db_path=None):
+    db_path = db_path or get_db_path()
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    with _schema_lock:
+        applied = _applied_schemas.setdefault(db_path, set())
+        pending = [i for i in range(len(_schema_scripts)) if i not in applied]
+        if pending:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for i in pending:
+                if callable(_schema_scripts[i]):
+                    _schema_scripts[i](conn)
+                else:
+                    conn.executescript(_schema_scripts[i])
+                applied.add(i)
+            conn.commit()
+
+    return conn
@@ -0,0 +1,183 @@
+import json
+import threading
+from collections import Counter
+
+# Response schemas for each call site that expects JSON back. They follow the
+# strict structured-output rules: every property is required and no extras
+# are allowed; optional values are expressed as nullable types.
+SCHEMAS = {
+    "moderation": {
+        "type": "object",
+        "properties": {
+            "flagged": {"type": "boolean"},
+            "categories": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["flagged", "categories"],
+        "additionalProperties": False
+    },
+    "extraction": {
+        "type": "object",
+        "properties": {
+            "extracted_value": {"type": ["string", "null"]}
+        },
+        "required": ["extracted_value"],
+        "additionalProperties": False
+    },
+    "disqualifiers": {
+        "type": "object",
+        "properties": {
+            "disqualified": {"type": "boolean"},
+            "reason": {"type": "string"},
+            "disqualifier_type": {
+                "type": "string",
+                "enum": ["workers_comp", "current_representation", "statute_expired", "jurisdiction", "minimal_case", "none"]
+            }
+        },
+        "required": ["disqualified", "reason", "disqualifier_type"],
+        "additionalProperties": False
+    },
+    "priority": {
+        "type": "object",
+        "properties": {
+            "total_score": {"type": "integer", "minimum": 0, "maximum": 100},
+            "priority_level": {"type": "string", "enum": ["URGENT", "HIGH", "MEDIUM", "LOW", "UNLIKELY"]},
+            "components": {
+                "type": "object",
+                "properties": {
+                    "injury": {"type": "integer", "minimum": 0, "maximum": 100},
+                    "liability": {"type": "integer", "minimum": 0, "maximum": 100},
+                    "damages": {"type": "integer", "minimum": 0, "maximum": 100},
+                    "documentation": {"type": "integer", "minimum": 0, "maximum": 100}
+                },
+                "required": ["injury", "liability", "damages", "documentation"],
+                "additionalProperties": False
+            },
+            "case_type": {"type": "string"},
+            "suggested_action": {"type": "string"},
+            "estimated_value_range": {"type": "string"},
+            "matches_firm_specialty": {"type": "boolean"},
+            "specialty_matched": {"type": ["string", "null"]}
+        },
+        "required": [
+            "total_score", "priority_level", "components", "case_type", "suggested_action",
+            "estimated_value_range", "matches_firm_specialty", "specialty_matched"
+        ],
+        "additionalProperties": False
+    }
+}
+
+REPAIR_PROMPT = """Your previous reply could not be used: {errors}.
+Reply again with only a JSON object that matches the required format. Do not include any other text."""
+
+# Process-wide parse outcome counts, keyed by (call site, outcome).
+# Outcomes: "ok", "repaired" (valid after the retry), "failed" (invalid after the retry).
+PARSE_STATS = Counter()
+_stats_lock = threading.Lock()
+
+class StructuredOutputError(Exception):
+    pass
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "null": type(None)
+}
+
+def _matches_type(value, type_name):
+    # bool is a subclass of int in Python, but not a number in JSON
+    if type_name == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if type_name == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, _JSON_TYPES[type_name])
+
+# Check a parsed value against a schema; returns a list of problems (empty if valid)
+def validate(value, schema, path="$"):
+    types = schema.get("type")
+    if types:
+        types = types if isinstance(types, list) else [types]
+        if not any(_matches_type(value, type_name) for type_name in types):
+            return [f"{path} should be {' or '.join(types)}"]
+
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path} should be one of {', '.join(schema['enum'])}")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if "minimum" in schema and value < schema["minimum"]:
+            errors.append(f"{path} should be at least {schema['minimum']}")
+        if "maximum" in schema and value > schema["maximum"]:
+            errors.append(f"{path} should be at most {schema['maximum']}")
+    if isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for name in schema.get("required", []):
+            if name not in value:
+                errors.append(f"{path}.{name} is missing")
+        for name, item in value.items():
+            if name in properties:
+                errors.extend(validate(item, properties[name], f"{path}.{name}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}.{name} is not allowed")
+    return errors
+
+# Parse a model reply as JSON and validate it; raises StructuredOutputError
+def parse(text, schema):
+    text = (text or "").strip()
+    # Some OpenAI-compatible servers wrap JSON in a markdown code fence
+    if text.startswith("```"):
+        text = text.strip("`").strip()
+        if text.startswith("json"):
+            text = text[len("json"):].strip()
+
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"the reply was not valid JSON ({e.msg})")
+
+    errors = validate(value, schema)
+    if errors:
+        raise StructuredOutputError("; ".join(errors))
+    return value
+
+def _count(site, outcome):
+    with _stats_lock:
+        PARSE_STATS[(site, outcome)] += 1
+
+# Parse outcome counts as {site: {outcome: count}}
+def get_parse_stats():
+    with _stats_lock:
+        stats = {}
+        for (site, outcome), count in PARSE_STATS.items():
+            stats.setdefault(site, {})[outcome] = count
+    return stats
+
+# Ask the provider for JSON matching the call site's schema. An invalid reply
+# gets one repair request that quotes the problems back to the model; if that
+# is still invalid, StructuredOutputError is raised.
+def request(provider, site, messages, temperature=0.3, max_tokens=500):
+    schema = SCHEMAS[site]
+    reply = provider.chat(messages, temperature=temperature, max_tokens=max_tokens, response_schema=(site, schema))
+    try:
+        value = parse(reply, schema)
+        _count(site, "ok")
+        return value
+    except StructuredOutputError as e:
+        first_error = e
+
+    repair_messages = [
+        *messages,
+        {"role": "assistant", "content": reply or ""},
+        {"role": "user", "content": REPAIR_PROMPT.format(errors=first_error)}
+    ]
+    reply = provider.chat(repair_messages, temperature=0, max_tokens=max_tokens, response_schema=(site, schema))
+    try:
+        value = parse(reply, schema)
+        _count(site, "repaired")
+        return value
+    except StructuredOutputError as e:
+        _count(site, "failed")
+        raise StructuredOutputError(f"{site}: {e}")
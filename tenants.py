@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+import prompts
+import review_queue
+
+logger = logging.getLogger(__name__)
+
+# Location of the tenant configuration - override with TENANTS_CONFIG_PATH
+DEFAULT_CONFIG_PATH = "tenants.json"
+
+# How often (seconds) to check the config file for changes
+RELOAD_CHECK_SECONDS = 2.0
+
+# Settings used for any tenant field the config file leaves out, and for the
+# whole tenant when there is no config file
+DEFAULT_TENANT = {
+    "name": "Personal Injury Law Firm",
+    # Firm specialties - customize for your firm
+    "specialties": [
+        "Motor Vehicle Accidents",
+        "Commercial Truck Accidents",
+        "Catastrophic Injuries",
+        "Medical Malpractice",
+        "Premises Liability",
+        "Product Liability",
+        "Wrongful Death"
+    ],
+    "jurisdictions": [],
+    "limitation_years": 2,
+    "sla_hours": review_queue.PRIORITY_SLA_HOURS,
+    "default_sla_hours": review_queue.DEFAULT_SLA_HOURS,
+    "response_times": review_queue.PRIORITY_RESPONSE_TIMES,
+    "default_response_time": review_queue.DEFAULT_RESPONSE_TIME,
+    # Office schedule the callback windows are counted in
+    "business_hours": review_queue.DEFAULT_BUSINESS_HOURS,
+    # Extra keywords per information category, added to prompts.INFO_CATEGORY_KEYWORDS
+    "info_keywords": {},
+    "branding": {
+        "title": "Personal Injury Law Firm",
+        "background_color": "#FFFFFF"
+    }
+}
+DEFAULT_TENANT_ID = "default"
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _is_string_list(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+def _is_mapping_of(check):
+    return lambda value: isinstance(value, dict) and all(check(item) for item in value.values())
+
+# Expected shape of each tenant setting: (check, description for the error message)
+SETTING_CHECKS = {
+    "name": (lambda value: isinstance(value, str), "a string"),
+    "specialties": (_is_string_list, "a list of strings"),
+    "jurisdictions": (_is_string_list, "a list of strings"),
+    "limitation_years": (lambda value: _is_number(value) and value > 0, "a positive number"),
+    "sla_hours": (_is_mapping_of(lambda value: _is_number(value) and value >= 0), "an object mapping priority levels to hours"),
+    "default_sla_hours": (lambda value: _is_number(value) and value >= 0, "a number of hours"),
+    "response_times": (_is_mapping_of(lambda value: isinstance(value, str)), "an object mapping priority levels to text"),
+    "default_response_time": (lambda value: isinstance(value, str), "a string"),
+    "info_keywords": (_is_mapping_of(_is_string_list), "an object mapping categories to lists of strings"),
+    "business_hours": (lambda value: isinstance(value, dict), "an object"),
+    "branding": (_is_mapping_of(lambda value: isinstance(value, str)), "an object of strings")
+}
+
+# Raise ValueError naming the first setting with the wrong shape
+def validate_settings(tenant_id, settings):
+    if not isinstance(settings, dict):
+        raise ValueError(f"tenant '{tenant_id}' should be an object")
+    for name, (check, description) in SETTING_CHECKS.items():
+        if name in settings and not check(settings[name]):
+            raise ValueError(f"tenant '{tenant_id}': {name} should be {description}")
+
+# One firm's settings with its prompts and keyword matchers compiled up front
+class Tenant:
+    def __init__(self, tenant_id, settings):
+        self.id = tenant_id
+        self.name = settings["name"]
+        self.specialties = list(settings["specialties"])
+        self.jurisdictions = list(settings["jurisdictions"])
+        self.limitation_years = settings["limitation_years"]
+        # Callback hours for every queue priority level
+        sla_hours = {**DEFAULT_TENANT["sla_hours"], **settings["sla_hours"]}
+        self.sla_hours = {
+            level: sla_hours.get(level, settings["default_sla_hours"])
+            for level in review_queue.PRIORITY_RANK
+        }
+        self.response_times = {**DEFAULT_TENANT["response_times"], **settings["response_times"]}
+        self.default_response_time = settings["default_response_time"]
+        self.branding = {**DEFAULT_TENANT["branding"], **settings["branding"]}
+        self.business_hours = {**DEFAULT_TENANT["business_hours"], **settings["business_hours"]}
+        # Fail on load rather than when the first intake is queued
+        review_queue.add_business_hours(review_queue.utc_now(), 0, self.business_hours)
+
+        if self.jurisdictions:
+            jurisdiction_note = f" (we only handle cases in: {', '.join(self.jurisdictions)})"
+        else:
+            jurisdiction_note = ""
+
+        self.prompts = prompts.compile_prompts(
+            specialties=", ".join(self.specialties),
+            jurisdiction_note=jurisdiction_note,
+            limitation_period=f"{self.limitation_years} year" + ("" if self.limitation_years == 1 else "s")
+        )
+
+        # One regex per information category instead of a substring scan per keyword
+        self.info_matchers = []
+        for category, keywords in prompts.INFO_CATEGORY_KEYWORDS.items():
+            keywords = (*keywords, *settings["info_keywords"].get(category, ()))
+            self.info_matchers.append(re.compile("|".join(re.escape(keyword.lower()) for keyword in keywords)))
+
+    def get_response_time(self, priority_level):
+        return self.response_times.get(priority_level, self.default_response_time)
+
+def get_config_path():
+    return os.getenv("TENANTS_CONFIG_PATH", DEFAULT_CONFIG_PATH)
+
+# Read the config file and compile every tenant in it
+def load_tenants(config_path):
+    if not os.path.exists(config_path):
+        return DEFAULT_TENANT_ID, {DEFAULT_TENANT_ID: Tenant(DEFAULT_TENANT_ID, DEFAULT_TENANT)}
+
+    with open(config_path, encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict) or not isinstance(config.get("tenants", {}), dict):
+        raise ValueError(f"{config_path} should hold an object with a \"tenants\" object")
+
+    tenants = {}
+    for tenant_id, settings in config.get("tenants", {}).items():
+        validate_settings(tenant_id, settings)
+        tenants[tenant_id] = Tenant(tenant_id, {**DEFAULT_TENANT, **settings})
+    if not tenants:
+        tenants[DEFAULT_TENANT_ID] = Tenant(DEFAULT_TENANT_ID, DEFAULT_TENANT)
+
+    default_tenant = config.get("default_tenant", next(iter(tenants)))
+    if default_tenant not in tenants:
+        raise ValueError(f"default_tenant '{default_tenant}' is not defined in {config_path}")
+    return default_tenant, tenants
+
+# Process-wide tenant registry, reloaded when the config file changes
+# "current" holds (default tenant ID, tenants) so readers always see a matching pair
+_registry = {"path": None, "mtime": None, "checked_at": 0.0, "current": None}
+_registry_lock = threading.Lock()
+
+def _config_mtime(config_path):
+    try:
+        return os.stat(config_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def _refresh():
+    config_path = get_config_path()
+    now = time.monotonic()
+    if _registry["path"] == config_path and now - _registry["checked_at"] < RELOAD_CHECK_SECONDS:
+        return
+
+    with _registry_lock:
+        if _registry["path"] == config_path and now - _registry["checked_at"] < RELOAD_CHECK_SECONDS:
+            return
+
+        mtime = _config_mtime(config_path)
+        if _registry["path"] != config_path or mtime != _registry["mtime"]:
+            try:
+                default_tenant, tenants = load_tenants(config_path)
+            except Exception as e:
+                # Any error in the new config: keep serving the last good one until the file is fixed
+                if not _registry["current"]:
+                    raise
+                logger.warning("Error reloading tenant config %s, keeping the last good config: %s", config_path, e)
+            else:
+                _registry["current"] = (default_tenant, tenants)
+            _registry["path"] = config_path
+            _registry["mtime"] = mtime
+        _registry["checked_at"] = now
+
+# The compiled tenant for an ID, or the default tenant if the ID is unknown
+def get_tenant(tenant_id=None):
+    _refresh()
+    default_tenant, tenants = _registry["current"]
+    return tenants.get(tenant_id) or tenants[default_tenant]
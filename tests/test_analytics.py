@@ -0,0 +1,118 @@
+import datetime
+
+import pytest
+
+import analytics
+import review_queue
+
+UTC = datetime.timezone.utc
+DAY = "2026-10-19"
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "intake.db")
+
+def at(hour, minute=0):
+    return datetime.datetime(2026, 10, 19, hour, minute, tzinfo=UTC)
+
+def rollups(db_path):
+    return {
+        (row["metric"], row["dimension"]): row["value"]
+        for row in analytics.get_rollups(DAY, DAY, db_path=db_path)
+    }
+
+@pytest.mark.parametrize("event_type, stage, detail, expected", [
+    ("started", "intake", None, [("started", "")]),
+    ("stage_changed", "welcome", {"from": "welcome", "to": "intake"}, [("stage_entered", "intake")]),
+    ("disqualified", "intake", {"disqualifier_type": "workers_comp"}, [("disqualified", "workers_comp")]),
+    ("disqualified", "intake", {}, [("disqualified", "none")]),
+    ("assessed", "intake", {"priority_level": "HIGH", "case_type": "Auto Accident"}, [("case_type", "Auto Accident"), ("priority", "HIGH")]),
+    ("assessed", "intake", {}, [("case_type", "Unclassified"), ("priority", "UNKNOWN")]),
+    ("completed", "results", {"outcome": "disqualified", "turns": 12, "duration_seconds": 619.5},
+     [("completed", ""), ("outcome", "disqualified"), ("turns", "12"), ("duration_minutes", "10")]),
+    ("completed", "results", {}, [("completed", ""), ("outcome", "qualified")]),
+    ("unknown_event", "intake", {}, [])
+])
+def test_rollup_increments(event_type, stage, detail, expected):
+    assert analytics.rollup_increments(event_type, stage, detail) == expected
+
+@pytest.mark.parametrize("histogram, expected", [
+    ({}, None),
+    ({5: 1}, 5),
+    ({3: 1, 10: 1}, 3),
+    ({3: 1, 7: 1, 10: 1}, 7),
+    ({1: 10, 50: 1}, 1),
+    ({12: 2, 8: 3, 20: 1}, 8)
+])
+def test_histogram_median(histogram, expected):
+    assert analytics.histogram_median(histogram) == expected
+
+def test_summary_rates(db_path):
+    for i in range(4):
+        analytics.record_event(f"intake-{i}", "started", tenant_id="smith-injury", occurred_at=at(9, i), db_path=db_path)
+    analytics.record_event("intake-0", "completed", tenant_id="smith-injury", occurred_at=at(10),
+                           detail={"outcome": "qualified", "turns": 10, "duration_seconds": 300}, db_path=db_path)
+    analytics.record_event("intake-1", "disqualified", tenant_id="smith-injury", occurred_at=at(10),
+                           detail={"disqualifier_type": "workers_comp"}, db_path=db_path)
+    analytics.record_event("intake-1", "completed", tenant_id="smith-injury", occurred_at=at(10),
+                           detail={"outcome": "disqualified", "turns": 14, "duration_seconds": 900}, db_path=db_path)
+    # Another firm's intake stays out of a per-firm summary
+    analytics.record_event("other", "started", tenant_id="harbor-legal", occurred_at=at(9), db_path=db_path)
+
+    summary = analytics.get_summary(DAY, DAY, tenant_id="smith-injury", db_path=db_path)
+    assert summary["started"] == 4
+    assert summary["completed"] == 2
+    assert summary["completion_rate"] == 0.5
+    assert summary["disqualified"] == 1
+    assert summary["disqualification_rate"] == 0.5
+    assert summary["disqualification_rate_by_type"] == {"workers_comp": 0.5}
+    assert summary["median_turns"] == 10
+    assert summary["median_minutes"] == 5
+
+    assert analytics.get_summary(DAY, DAY, db_path=db_path)["started"] == 5
+
+def test_summary_with_no_intakes(db_path):
+    summary = analytics.get_summary(DAY, DAY, db_path=db_path)
+    assert summary["completion_rate"] is None
+    assert summary["disqualification_rate"] is None
+    assert summary["disqualification_rate_by_type"] == {}
+    assert summary["median_turns"] is None
+
+def enqueue(db_path, intake_id):
+    review_queue.enqueue_intake(
+        intake_id,
+        {"q1": {"question": "What is your full name?", "answer": "Jane", "extracted_value": "Jane"}},
+        case_priority={"priority_level": "HIGH", "case_type": "Auto Accident"},
+        started_at=at(9),
+        completed_at=at(9, 30),
+        tenant_id="smith-injury",
+        db_path=db_path
+    )
+
+def test_backfill_runs_once(db_path):
+    enqueue(db_path, "old-1")
+    enqueue(db_path, "old-2")
+
+    assert list(analytics.backfill_rollups(db_path=db_path)) == [2]
+    counts = rollups(db_path)
+    assert counts[("started", "")] == 2
+    assert counts[("completed", "")] == 2
+    assert counts[("priority", "HIGH")] == 2
+    assert counts[("duration_minutes", "30")] == 2
+
+    assert list(analytics.backfill_rollups(db_path=db_path)) == []
+    assert rollups(db_path) == counts
+
+def test_backfill_keeps_live_events(db_path):
+    # The intake's live started/assessed events were written but its completed event was not
+    enqueue(db_path, "partial")
+    analytics.record_event("partial", "started", tenant_id="smith-injury", stage="intake", occurred_at=at(9), db_path=db_path)
+    analytics.record_event("partial", "assessed", tenant_id="smith-injury", stage="intake", occurred_at=at(9, 29),
+                           detail={"priority_level": "HIGH", "case_type": "Auto Accident"}, db_path=db_path)
+
+    assert list(analytics.backfill_rollups(db_path=db_path)) == [1]
+    counts = rollups(db_path)
+    assert counts[("started", "")] == 1
+    assert counts[("case_type", "Auto Accident")] == 1
+    assert counts[("priority", "HIGH")] == 1
+    assert counts[("completed", "")] == 1
@@ -0,0 +1,199 @@
+import csv
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import export
+import review_queue
+
+# Local stand-in for a CRM webhook. `statuses` is the list of HTTP status codes
+# to answer with, in order; once it runs out every request gets 200.
+class WebhookStandIn:
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.requests = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                stand_in.requests.append({"headers": dict(self.headers), "body": json.loads(body)})
+                status = stand_in.statuses.pop(0) if stand_in.statuses else 200
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/intakes"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "intake.db")
+
+@pytest.fixture
+def stand_in():
+    servers = []
+
+    def start(statuses=()):
+        server = WebhookStandIn(statuses)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+def add_intakes(db_path, count):
+    for i in range(count):
+        review_queue.enqueue_intake(
+            f"intake-{i:04d}",
+            {"q1": {"question": "What is your full name?", "answer": f"Client {i}", "extracted_value": f"Client {i}"}},
+            case_priority={"priority_level": "HIGH", "total_score": 70, "case_type": "Auto Accident"},
+            tenant_id="smith-injury",
+            db_path=db_path
+        )
+
+def test_webhook_retries_server_errors_and_rate_limits(db_path, stand_in):
+    add_intakes(db_path, 3)
+    server = stand_in([503, 429, 500])
+    sink = export.WebhookSink(server.url, backoff_seconds=0)
+
+    export.run_export(sink, db_path=db_path)
+
+    assert len(server.requests) == 4
+    assert [len(request["body"]["records"]) for request in server.requests] == [3, 3, 3, 3]
+    assert export.get_cursor(sink.name, db_path) == 3
+
+def test_webhook_client_error_is_not_retried(db_path, stand_in):
+    add_intakes(db_path, 2)
+    server = stand_in([400])
+    sink = export.WebhookSink(server.url, backoff_seconds=0)
+
+    with pytest.raises(export.ExportError, match="HTTP 400"):
+        export.run_export(sink, db_path=db_path)
+
+    assert len(server.requests) == 1
+    assert export.get_cursor(sink.name, db_path) == 0
+
+def test_failed_delivery_is_replayed_with_the_same_idempotency_key(db_path, stand_in):
+    add_intakes(db_path, 5)
+    server = stand_in([503, 503])
+    sink = export.WebhookSink(server.url, max_retries=1, backoff_seconds=0)
+
+    # Both attempts fail, so the cursor must not move past the batch
+    with pytest.raises(export.ExportError, match="after 2 attempts"):
+        export.run_export(sink, batch_size=2, db_path=db_path)
+    assert export.get_cursor(sink.name, db_path) == 0
+
+    # The next run starts from the same batch (at-least-once)
+    export.run_export(sink, batch_size=2, db_path=db_path)
+    assert export.get_cursor(sink.name, db_path) == 5
+
+    keys = [request["headers"]["Idempotency-Key"] for request in server.requests]
+    assert keys[0] == keys[1] == keys[2]
+    assert server.requests[0]["body"] == server.requests[2]["body"]
+    assert server.requests[2]["body"]["batch_id"] == keys[2]
+    # Later batches get their own keys, and nothing after the failed batch was skipped
+    assert len(set(keys[2:])) == 3
+    delivered = [record["intake_id"] for request in server.requests[2:] for record in request["body"]["records"]]
+    assert delivered == [f"intake-{i:04d}" for i in range(5)]
+
+def test_webhook_sends_bearer_token(db_path, stand_in):
+    add_intakes(db_path, 1)
+    server = stand_in()
+    export.run_export(export.WebhookSink(server.url, token="secret-token"), db_path=db_path)
+
+    assert server.requests[0]["headers"]["Authorization"] == "Bearer secret-token"
+
+def test_csv_export_round_trips_flattened_intakes(db_path, tmp_path):
+    review_queue.enqueue_intake(
+        "intake-quoted",
+        {
+            "q1": {"question": "What happened?", "answer": 'Rear-ended, "hard", at 5pm\nthen taken to hospital', "extracted_value": None},
+            "q2": {"question": "What is your email address?", "answer": "ana@example.com", "extracted_value": "ana@example.com"}
+        },
+        case_priority={
+            "priority_level": "URGENT",
+            "total_score": 91,
+            "components": {"injury": 95, "liability": 90, "damages": 88, "documentation": 80},
+            "case_type": "Commercial Truck Accident",
+            "suggested_action": "Call today, then request police report",
+            "matches_firm_specialty": True,
+            "specialty_matched": "Commercial Truck Accidents"
+        },
+        tenant_id="smith-injury",
+        db_path=db_path
+    )
+    review_queue.enqueue_intake(
+        "intake-disqualified",
+        {},
+        disqualified=True,
+        disqualification_reason={"disqualifier_type": "workers_comp", "reason": "Injured at work, covered by workers' comp"},
+        db_path=db_path
+    )
+
+    expected = [records for _, records in export.iter_intake_batches(db_path=db_path)][0]
+    export.run_export(export.CsvSink(str(tmp_path / "out")), db_path=db_path)
+
+    files = sorted((tmp_path / "out").iterdir())
+    assert [path.name for path in files] == ["intakes-000000000002.csv"]
+    with open(files[0], newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        assert reader.fieldnames == export.EXPORT_COLUMNS
+        rows = list(reader)
+
+    # CSV keeps every value as text: None becomes "" and other values use str()
+    assert rows == [
+        {column: "" if record[column] is None else str(record[column]) for column in export.EXPORT_COLUMNS}
+        for record in expected
+    ]
+
+    urgent, disqualified = rows
+    assert urgent["priority_level"] == "URGENT"
+    assert urgent["injury_score"] == "95"
+    assert urgent["matches_firm_specialty"] == "True"
+    assert urgent["specialty_matched"] == "Commercial Truck Accidents"
+    assert json.loads(urgent["intake_responses"])["q1"]["answer"] == 'Rear-ended, "hard", at 5pm\nthen taken to hospital'
+    assert json.loads(urgent["intake_responses"])["q1"]["extracted_value"] is None
+    assert urgent["question_count"] == "2"
+
+    assert disqualified["priority_level"] == "DISQUALIFIED"
+    assert disqualified["disqualified"] == "True"
+    assert disqualified["disqualifier_type"] == "workers_comp"
+    assert disqualified["disqualification_reason"] == "Injured at work, covered by workers' comp"
+    assert disqualified["total_score"] == ""
+    assert disqualified["tenant_id"] == ""
+
+def test_follow_logs_metrics_and_lag_after_every_poll(db_path, tmp_path, monkeypatch, caplog):
+    add_intakes(db_path, 3)
+    polls = []
+
+    def sleep(seconds):
+        polls.append(seconds)
+        if len(polls) == 1:
+            # An intake that completes between polls
+            review_queue.enqueue_intake("intake-late", {}, db_path=db_path)
+        else:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(export.time, "sleep", sleep)
+    sink = export.CsvSink(str(tmp_path / "out"))
+    with caplog.at_level("INFO", logger="export"), pytest.raises(KeyboardInterrupt):
+        export.follow_export(sink, poll_seconds=5, db_path=db_path)
+
+    reports = [json.loads(record.getMessage()) for record in caplog.records]
+    assert polls == [5, 5]
+    assert [report["sink"] for report in reports] == [sink.name, sink.name]
+    assert [report["metrics"]["records"] for report in reports] == [3, 4]
+    assert all(report["lag"]["pending_records"] == 0 for report in reports)
@@ -0,0 +1,30 @@
+import logging
+
+import llm
+
+class FailingProvider(llm.LLMProvider):
+    name = "failing"
+
+    def chat(self, messages, temperature=0.7, max_tokens=1000, response_schema=None):
+        raise ConnectionError("primary is down")
+
+    def stream(self, messages, temperature=0.7, max_tokens=1000):
+        raise ConnectionError("primary is down")
+        yield
+
+    def moderate(self, text):
+        raise ConnectionError("primary is down")
+
+def test_fallback_is_logged(caplog):
+    provider = llm.FallbackProvider(FailingProvider(), llm.ScriptedProvider(["canned"]))
+    with caplog.at_level(logging.WARNING, logger="llm"):
+        assert provider.chat([]) == "canned"
+        assert list(provider.stream([])) == ["canned"]
+        assert provider.moderate("hello") == {"flagged": False, "categories": []}
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == [
+        "failing chat failed, using stub: primary is down",
+        "failing stream failed, using stub: primary is down",
+        "failing moderation failed, using stub: primary is down"
+    ]
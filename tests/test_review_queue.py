@@ -0,0 +1,125 @@
+import datetime
+
+import pytest
+
+import review_queue
+
+UTC = datetime.timezone.utc
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "intake.db")
+
+def at(*args):
+    return datetime.datetime(*args, tzinfo=UTC)
+
+@pytest.mark.parametrize("start, hours, business_hours, expected", [
+    # Inside the window
+    (at(2026, 10, 19, 10, 0), 2, None, at(2026, 10, 19, 12, 0)),
+    # Spans the close of business: 1 hour Monday, 1 hour Tuesday
+    (at(2026, 10, 19, 16, 0), 2, None, at(2026, 10, 20, 10, 0)),
+    # Before opening starts the clock at opening
+    (at(2026, 10, 19, 6, 30), 2, None, at(2026, 10, 19, 11, 0)),
+    # Friday night is due two hours after Monday opens
+    (at(2026, 10, 16, 23, 0), 2, None, at(2026, 10, 19, 11, 0)),
+    # Exactly at close finishes that day
+    (at(2026, 10, 19, 9, 0), 8, None, at(2026, 10, 19, 17, 0)),
+    # Three business days over a weekend
+    (at(2026, 10, 16, 9, 0), 24, None, at(2026, 10, 20, 17, 0)),
+    # Holidays are skipped
+    (at(2026, 12, 24, 16, 0), 2, {"holidays": ["2026-12-25"]}, at(2026, 12, 28, 10, 0)),
+    # Office hours are local: 9:00 in Chicago is 14:00 UTC during daylight saving time
+    (at(2026, 10, 19, 12, 0), 1, {"timezone": "America/Chicago"}, at(2026, 10, 19, 15, 0)),
+    # ...and 15:00 UTC after the clocks go back
+    (at(2026, 11, 2, 12, 0), 1, {"timezone": "America/Chicago"}, at(2026, 11, 2, 16, 0)),
+    # A Saturday office
+    (at(2026, 10, 17, 9, 0), 2, {"weekdays": [5]}, at(2026, 10, 17, 11, 0))
+])
+def test_add_business_hours(start, hours, business_hours, expected):
+    assert review_queue.add_business_hours(start, hours, business_hours) == expected
+
+def test_add_business_hours_rejects_schedules_with_no_open_time():
+    with pytest.raises(ValueError):
+        review_queue.add_business_hours(at(2026, 10, 19, 9, 0), 2, {"weekdays": []})
+    with pytest.raises(ValueError):
+        review_queue.add_business_hours(at(2026, 10, 19, 9, 0), 2, {"open_hour": 17, "close_hour": 9})
+
+def enqueue(db_path, intake_id, priority_level, tenant_id="smith-injury", completed_at=None):
+    review_queue.enqueue_intake(
+        intake_id,
+        {},
+        case_priority={"priority_level": priority_level, "case_type": "Auto Accident"},
+        completed_at=completed_at or at(2026, 10, 19, 10, 0),
+        tenant_id=tenant_id,
+        db_path=db_path
+    )
+
+def test_enqueue_sets_business_hours_deadline(db_path):
+    enqueue(db_path, "urgent", "URGENT", completed_at=at(2026, 10, 16, 23, 0))
+    entry, = review_queue.get_next_due(db_path=db_path)
+    assert entry["sla_deadline"] == "2026-10-19T11:00:00+00:00"
+
+def test_keyset_pages_cover_the_queue_in_order(db_path):
+    levels = ["LOW", "URGENT", "MEDIUM", "HIGH", "UNKNOWN"]
+    for i in range(23):
+        enqueue(db_path, f"intake-{i:02d}", levels[i % len(levels)], completed_at=at(2026, 10, 19, 9, 0) + datetime.timedelta(minutes=i))
+
+    pages = []
+    cursor = None
+    while True:
+        entries, cursor = review_queue.get_review_queue(page_size=5, after=cursor, db_path=db_path)
+        pages.append(entries)
+        if not cursor:
+            break
+
+    seen = [entry["intake_id"] for page in pages for entry in page]
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert len(set(seen)) == 23
+    keys = [(entry["priority_rank"], entry["sla_deadline"], entry["id"]) for page in pages for entry in page]
+    assert keys == sorted(keys)
+    assert pages[0][0]["priority_level"] == "URGENT"
+
+def test_exact_page_multiple_ends_with_an_empty_page(db_path):
+    for i in range(4):
+        enqueue(db_path, f"intake-{i}", "HIGH")
+
+    entries, cursor = review_queue.get_review_queue(page_size=4, db_path=db_path)
+    assert len(entries) == 4
+    entries, cursor = review_queue.get_review_queue(page_size=4, after=cursor, db_path=db_path)
+    assert entries == [] and cursor is None
+
+def test_queries_are_scoped_to_the_tenant(db_path):
+    enqueue(db_path, "smith-1", "URGENT", tenant_id="smith-injury")
+    enqueue(db_path, "smith-2", "LOW", tenant_id="smith-injury")
+    enqueue(db_path, "harbor-1", "HIGH", tenant_id="harbor-legal")
+
+    entries, _ = review_queue.get_review_queue(tenant_id="harbor-legal", db_path=db_path)
+    assert [entry["intake_id"] for entry in entries] == ["harbor-1"]
+    assert [entry["intake_id"] for entry in review_queue.get_next_due(tenant_id="smith-injury", db_path=db_path)] == ["smith-1", "smith-2"]
+    assert review_queue.get_queue_counts(tenant_id="smith-injury", db_path=db_path) == {"URGENT": 1, "LOW": 1}
+    assert review_queue.get_queue_counts(tenant_id="harbor-legal", db_path=db_path) == {"HIGH": 1}
+
+def test_mark_reviewed_only_touches_the_tenant_s_intakes(db_path):
+    enqueue(db_path, "smith-1", "URGENT", tenant_id="smith-injury")
+    enqueue(db_path, "harbor-1", "HIGH", tenant_id="harbor-legal")
+
+    assert not review_queue.mark_reviewed("harbor-1", tenant_id="smith-injury", db_path=db_path)
+    assert review_queue.get_queue_counts(tenant_id="harbor-legal", db_path=db_path) == {"HIGH": 1}
+
+    assert review_queue.mark_reviewed("harbor-1", tenant_id="harbor-legal", db_path=db_path)
+    assert review_queue.get_queue_counts(tenant_id="harbor-legal", db_path=db_path) == {}
+    # Already reviewed
+    assert not review_queue.mark_reviewed("harbor-1", tenant_id="harbor-legal", db_path=db_path)
+    assert review_queue.get_queue_counts(tenant_id="smith-injury", db_path=db_path) == {"URGENT": 1}
+
+def test_enqueue_is_idempotent(db_path):
+    enqueue(db_path, "smith-1", "URGENT")
+    enqueue(db_path, "smith-1", "LOW")
+    assert review_queue.get_queue_counts(db_path=db_path) == {"URGENT": 1}
+
+def test_disqualified_intakes_go_to_the_back(db_path):
+    review_queue.enqueue_intake("dq", {}, disqualified=True, disqualification_reason={"disqualifier_type": "workers_comp"}, db_path=db_path)
+    enqueue(db_path, "low", "LOW")
+    entries, _ = review_queue.get_review_queue(db_path=db_path)
+    assert [entry["priority_level"] for entry in entries] == ["LOW", "DISQUALIFIED"]
+    assert entries[1]["disqualified"] is True
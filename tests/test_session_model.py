@@ -0,0 +1,39 @@
+import prompts
+from session_model import TurnLog, IntakeResponses, question_id_for
+
+# A new string object with the same text, as text arrives from the API
+def fresh(text):
+    return "".join(list(text))
+
+def test_canned_questions_are_shared_and_generated_ones_are_not():
+    turns = TurnLog()
+    canned = turns.append("assistant", fresh(prompts.EMAIL_QUESTION))
+    generated_text = fresh("Which hospital treated you after the collision?")
+    generated = turns.append("assistant", generated_text)
+
+    assert turns.content(canned) is prompts.EMAIL_QUESTION
+    assert turns.content(generated) is generated_text
+
+def test_null_extracted_value_is_kept_distinct_from_the_answer():
+    turns = TurnLog()
+    responses = IntakeResponses(turns)
+    question = turns.append("assistant", prompts.NAME_QUESTION)
+    answer = turns.append("user", "Ana Lopez")
+    responses.record(question_id_for(prompts.NAME_QUESTION), question, answer, None)
+
+    incident = turns.append("assistant", prompts.INCIDENT_QUESTION)
+    description = turns.append("user", "A truck ran a red light and hit my car.")
+    responses.record(question_id_for(prompts.INCIDENT_QUESTION), incident, description, "A truck ran a red light and hit my car.")
+
+    assert responses.as_dict() == {
+        question_id_for(prompts.NAME_QUESTION): {
+            "question": prompts.NAME_QUESTION,
+            "answer": "Ana Lopez",
+            "extracted_value": None
+        },
+        question_id_for(prompts.INCIDENT_QUESTION): {
+            "question": prompts.INCIDENT_QUESTION,
+            "answer": "A truck ran a red light and hit my car.",
+            "extracted_value": "A truck ran a red light and hit my car."
+        }
+    }
@@ -0,0 +1,51 @@
+import pytest
+
+import staff_auth
+
+# Few iterations keep the tests fast; the stored format is the same
+@pytest.fixture(scope="module")
+def accounts():
+    return staff_auth.load_staff_accounts({
+        "ann": {"password_hash": staff_auth.hash_password("correct horse", iterations=1000), "firm": "smith-injury"},
+        "bob": {"password_hash": staff_auth.hash_password("battery staple", iterations=1000), "firm": "harbor-legal"}
+    })
+
+def test_hash_round_trip_uses_a_fresh_salt():
+    first = staff_auth.hash_password("secret", iterations=1000)
+    second = staff_auth.hash_password("secret", iterations=1000)
+    assert first != second
+    assert first.startswith("pbkdf2_sha256$1000$")
+    assert staff_auth.verify_password("secret", first)
+    assert not staff_auth.verify_password("Secret", first)
+
+@pytest.mark.parametrize("password_hash", [
+    "",
+    "not-a-hash",
+    "pbkdf2_sha256$1000$abcd",
+    "pbkdf2_sha256$many$abcd$abcd",
+    "pbkdf2_sha256$1000$not-hex$abcd",
+    "md5$1000$abcd$abcd",
+    None
+])
+def test_malformed_hashes_never_verify(password_hash):
+    assert not staff_auth.verify_password("secret", password_hash)
+
+def test_authenticate_returns_the_account_firm(accounts):
+    assert staff_auth.authenticate("ann", "correct horse", accounts) == {"username": "ann", "firm": "smith-injury"}
+    assert staff_auth.authenticate("bob", "battery staple", accounts) == {"username": "bob", "firm": "harbor-legal"}
+
+def test_authenticate_rejects_wrong_password_and_unknown_user(accounts):
+    assert staff_auth.authenticate("ann", "battery staple", accounts) is None
+    assert staff_auth.authenticate("carol", "correct horse", accounts) is None
+    assert staff_auth.authenticate("", "", accounts) is None
+
+def test_accounts_without_hash_or_firm_are_skipped():
+    accounts = staff_auth.load_staff_accounts({
+        "ann": {"password_hash": "pbkdf2_sha256$1$00$00", "firm": "smith-injury"},
+        "no-firm": {"password_hash": "pbkdf2_sha256$1$00$00"},
+        "empty-firm": {"password_hash": "pbkdf2_sha256$1$00$00", "firm": ""},
+        "no-hash": {"firm": "smith-injury"},
+        "not-a-table": "password"
+    })
+    assert list(accounts) == ["ann"]
+    assert staff_auth.load_staff_accounts(None) == {}
@@ -0,0 +1,54 @@
+import pytest
+
+import llm
+import structured_output
+
+# Local provider whose model replies come from a list instead of a server
+class ScriptedLocalProvider(llm.LocalProvider):
+    def __init__(self, replies):
+        super().__init__(base_url="http://127.0.0.1:9/v1")
+        self.replies = list(replies)
+        self.requests = []
+
+    def chat(self, messages, temperature=0.7, max_tokens=1000, response_schema=None):
+        self.requests.append({"messages": messages, "response_format": self.response_format(*response_schema)})
+        return self.replies.pop(0)
+
+def parse_counts(site):
+    return structured_output.get_parse_stats().get(site, {})
+
+def test_local_moderation_uses_the_moderation_schema():
+    provider = ScriptedLocalProvider(['{"flagged": true, "categories": ["harassment"]}'])
+    before = parse_counts("moderation").get("ok", 0)
+
+    assert provider.moderate("some text") == {"flagged": True, "categories": ["harassment"]}
+    assert provider.requests[0]["response_format"] == {"type": "json_object"}
+    assert parse_counts("moderation")["ok"] == before + 1
+
+def test_local_moderation_repairs_an_invalid_verdict():
+    provider = ScriptedLocalProvider([
+        'Sure! {"flagged": false}',
+        '{"flagged": false, "categories": []}'
+    ])
+    before = parse_counts("moderation").get("repaired", 0)
+
+    assert provider.moderate("hello") == {"flagged": False, "categories": []}
+    assert "not valid JSON" in provider.requests[1]["messages"][-1]["content"]
+    assert parse_counts("moderation")["repaired"] == before + 1
+
+@pytest.mark.parametrize("replies", [
+    ["I can't classify that.", "No JSON here either."],
+    ['{"flagged": "no", "categories": []}', '{"flagged": false, "categories": [1]}']
+])
+def test_unusable_moderation_verdict_raises(replies):
+    provider = ScriptedLocalProvider(replies)
+    before = parse_counts("moderation").get("failed", 0)
+
+    with pytest.raises(structured_output.StructuredOutputError):
+        provider.moderate("hello")
+    assert parse_counts("moderation")["failed"] == before + 1
+
+def test_array_items_are_validated():
+    schema = structured_output.SCHEMAS["moderation"]
+    assert structured_output.validate({"flagged": True, "categories": ["hate"]}, schema) == []
+    assert structured_output.validate({"flagged": True, "categories": ["hate", 3]}, schema) == ["$.categories[1] should be string"]
@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import llm
+import prompts
+import review_queue
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agent.py")
+
+# Client answers for a full intake, in order; the last ones repeat if the
+# intake asks more questions
+ANSWERS = [
+    "For myself",
+    "Jane Doe",
+    "555-123-4567",
+    "jane@example.com",
+    "A truck ran a red light and hit my car last month",
+    "I had a broken arm and still have pain",
+    "I was treated at the hospital and had surgery",
+    "The truck driver was at fault",
+    "There is a police report and a witness",
+    "Yes, I have their insurance details",
+    "I missed three weeks of work",
+    "I am still in physical therapy"
+]
+
+@pytest.fixture
+def stub_app_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    monkeypatch.delenv("LLM_FALLBACK_PROVIDER", raising=False)
+    monkeypatch.setenv("INTAKE_DB_PATH", str(tmp_path / "intake.db"))
+    monkeypatch.setenv("TENANTS_CONFIG_PATH", str(tmp_path / "no-tenants.json"))
+    # Providers are cached per process; build them from this environment
+    st.cache_resource.clear()
+    yield
+    st.cache_resource.clear()
+
+def start_intake():
+    app = AppTest.from_file(APP_PATH, default_timeout=60)
+    app.run()
+    app.button[0].click().run()
+    return app
+
+def answer_next_question(app):
+    answered = len(app.session_state["intake_responses"])
+    app.text_input(key="user_input").input(ANSWERS[min(answered, len(ANSWERS) - 1)])
+    app.button[0].click().run()
+    assert not app.exception, app.exception
+
+def transcript(app):
+    return list(app.session_state["conversation_history"].contents())
+
+def test_stub_replies_follow_each_conversation():
+    provider = llm.ScriptedProvider(["first", "second", "third"])
+    conversation_a = [{"role": "system", "content": "prompt"}]
+    conversation_b = [{"role": "system", "content": "prompt"}]
+
+    replies_a = []
+    replies_b = []
+    for _ in range(4):
+        # Interleave two conversations on the same provider
+        replies_a.append(provider.chat(conversation_a))
+        conversation_a.append({"role": "assistant", "content": replies_a[-1]})
+        replies_b.append(provider.chat(conversation_b))
+        conversation_b.append({"role": "assistant", "content": replies_b[-1]})
+        replies_b.append(provider.chat(conversation_b))
+        conversation_b.append({"role": "assistant", "content": replies_b[-1]})
+
+    assert replies_a == ["first", "second", "third", "first"]
+    assert replies_b == ["first", "second", "third", "first", "second", "third", "first", "second"]
+    assert provider.call_count == 12
+
+# Drive many complete intakes offline, interleaving their turns as concurrent
+# sessions would, and check every one finishes with the same transcript
+def test_offline_intake_throughput(stub_app_env):
+    intake_count = 10
+
+    apps = [start_intake() for _ in range(intake_count)]
+    runs = 2 * intake_count
+    while any(app.session_state["current_stage"] == "intake" for app in apps):
+        for app in apps:
+            if app.session_state["current_stage"] == "intake":
+                answer_next_question(app)
+                runs += 1
+        assert runs < 50 * intake_count, "intakes did not finish"
+
+    for app in apps:
+        assert app.session_state["current_stage"] == "results"
+        assert not app.session_state["disqualified"]
+        assert app.session_state["case_priority"]["priority_level"] == "MEDIUM"
+        assert transcript(app) == transcript(apps[0])
+
+    counts = review_queue.get_queue_counts()
+    assert counts == {"MEDIUM": intake_count}
+
+# OpenAI-compatible stand-in for a local moderation model. Replies come from
+# `replies` in order; once it runs out every message is judged safe.
+class LocalModelStandIn:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                content = stand_in.replies.pop(0) if stand_in.replies else '{"flagged": false, "categories": []}'
+                body = json.dumps({
+                    "id": "chatcmpl-stand-in",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": "stand-in",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}]
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def submit(app, text):
+    app.text_input(key="user_input").input(text)
+    app.button[0].click().run()
+    assert not app.exception, app.exception
+
+# A moderation verdict that can't be parsed holds the message; resubmitting it
+# must record the answer against the question that was actually asked
+def test_answer_resubmitted_after_moderation_failure(stub_app_env, monkeypatch):
+    safe = '{"flagged": false, "categories": []}'
+    # Greeting answer passes; "Jane Doe" gets two unusable verdicts (reply and repair)
+    stand_in = LocalModelStandIn([safe, "I think it is fine.", "Still no JSON."])
+    monkeypatch.setenv("LLM_PROVIDER_MODERATION", "local")
+    monkeypatch.setenv("LOCAL_LLM_BASE_URL", stand_in.url)
+    try:
+        app = start_intake()
+        submit(app, "For myself")
+        assert transcript(app)[-1] == prompts.NAME_QUESTION
+
+        submit(app, "Jane Doe")
+        assert "try submitting it again" in app.error[0].value
+        assert transcript(app)[-1] == prompts.NAME_QUESTION
+        assert len(app.session_state["intake_responses"]) == 1
+
+        submit(app, "Jane Doe")
+    finally:
+        stand_in.close()
+
+    conversation_history = app.session_state["conversation_history"]
+    assert [conversation_history.role(i) for i in range(len(conversation_history))] == ["assistant", "user", "assistant", "user", "assistant"]
+    answers = dict(app.session_state["intake_responses"].question_answers())
+    assert answers[prompts.NAME_QUESTION] == "Jane Doe"
+    assert transcript(app)[-1] == prompts.PHONE_QUESTION
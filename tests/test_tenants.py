@@ -0,0 +1,37 @@
+import json
+import os
+
+import pytest
+
+import tenants
+
+def write_config(path, config, mtime_ns):
+    path.write_text(json.dumps(config))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+@pytest.fixture
+def config_path(tmp_path, monkeypatch):
+    path = tmp_path / "tenants.json"
+    monkeypatch.setenv("TENANTS_CONFIG_PATH", str(path))
+    monkeypatch.setattr(tenants, "RELOAD_CHECK_SECONDS", 0)
+    monkeypatch.setattr(tenants, "_registry", {"path": None, "mtime": None, "checked_at": 0.0, "current": None})
+    return path
+
+@pytest.mark.parametrize("bad_settings", [
+    {"info_keywords": ["clinic"]},
+    {"specialties": "Medical Malpractice"},
+    {"sla_hours": {"URGENT": "2"}},
+    {"business_hours": {"timezone": "Nowhere/Unknown"}},
+    "not an object"
+])
+def test_bad_edit_keeps_last_good_config(config_path, bad_settings):
+    write_config(config_path, {"tenants": {"harbor": {"name": "Harbor Legal Group"}}}, 1_000_000_000)
+    assert tenants.get_tenant("harbor").name == "Harbor Legal Group"
+
+    write_config(config_path, {"tenants": {"harbor": bad_settings}}, 2_000_000_000)
+    assert tenants.get_tenant("harbor").name == "Harbor Legal Group"
+
+def test_bad_config_on_first_load_raises(config_path):
+    write_config(config_path, {"tenants": {"harbor": {"info_keywords": ["clinic"]}}}, 1_000_000_000)
+    with pytest.raises(ValueError, match="info_keywords"):
+        tenants.get_tenant("harbor")